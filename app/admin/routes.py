@@ -0,0 +1,84 @@
+import asyncio
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.core.security import require_admin
+from app.models.admin import WarmupRequest
+from app.cache.embedding_cache import embedding_cache_stats
+from app.cache.semantic_cache import semantic_cache_stats
+from app.rag.embeddings import embedding_batcher
+from app.rag.single_flight import single_flight_stats
+from app.core.resilience import resilience_stats
+from app.core.config import FLIGHT_RECORDER_SLOW_MS
+from app.core.flight_recorder import slow_requests, flight_recorder_stats
+from app.rag.warmup import (
+    WarmupJob,
+    eval_questions,
+    traffic_questions,
+    dedupe
+)
+
+router = APIRouter(prefix="/admin")
+
+_warmup = {"job": None, "task": None}
+
+
+@router.get("/cache/stats")
+def cache_stats(current_user=Depends(require_admin)):
+    return {
+        "semantic_cache": semantic_cache_stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "embedding_batcher": embedding_batcher.stats() if embedding_batcher else None,
+        "single_flight": single_flight_stats(),
+        "resilience": resilience_stats(),
+        "flight_recorder": flight_recorder_stats()
+    }
+
+
+@router.get("/requests/slow")
+async def list_slow_requests(
+    role: Optional[str] = None,
+    stage: Optional[str] = None,
+    min_ms: float = FLIGHT_RECORDER_SLOW_MS,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 50,
+    source: Literal["memory", "redis"] = "memory",
+    current_user=Depends(require_admin)
+):
+    """
+    Recorded requests, newest first. With `stage`, `min_ms` is matched
+    against that stage instead of the total. `since` / `until` are unix
+    timestamps.
+    """
+    entries = await slow_requests(role, stage, min_ms, since, until, limit, source)
+    return {"count": len(entries), "requests": entries}
+
+
+@router.post("/cache/warmup")
+async def start_warmup(req: WarmupRequest, current_user=Depends(require_admin)):
+    job = _warmup["job"]
+    if job is not None and job.status == "running":
+        raise HTTPException(status_code=409, detail="Warm-up already running")
+
+    if req.source == "eval":
+        items = await asyncio.to_thread(eval_questions)
+    elif req.source == "questions":
+        items = [(q.role, q.question) for q in req.questions]
+    else:
+        items = await asyncio.to_thread(traffic_questions, req.top_n, req.roles)
+
+    job = WarmupJob(dedupe(items, req.roles), req.concurrency)
+    _warmup["job"] = job
+    # Runs on the server's event loop, where the async clients live
+    _warmup["task"] = asyncio.create_task(job.run())
+
+    return job.progress()
+
+
+@router.get("/cache/warmup")
+def warmup_status(current_user=Depends(require_admin)):
+    job = _warmup["job"]
+    if job is None:
+        return {"status": "idle"}
+    return job.progress()
@@ -0,0 +1,49 @@
+from itertools import combinations
+from typing import Iterable, List
+from app.core.config import RBAC_ROLES
+
+
+def access_label(roles: Iterable[str]) -> str:
+    """
+    Canonical name of an access set, e.g. "employee+manager".
+    """
+    return "+".join(sorted(set(roles)))
+
+
+def readable_partitions(role: str) -> List[str]:
+    """
+    Every access set `role` belongs to. An entry cached under any of them
+    was produced only from chunks this role is allowed to read.
+    """
+    if role not in RBAC_ROLES:
+        return [role]
+
+    others = [r for r in RBAC_ROLES if r != role]
+    labels = []
+    for size in range(len(others) + 1):
+        for extra in combinations(others, size):
+            labels.append(access_label((role,) + extra))
+    return labels
+
+
+def all_partitions() -> List[str]:
+    return [
+        access_label(combo)
+        for size in range(1, len(RBAC_ROLES) + 1)
+        for combo in combinations(RBAC_ROLES, size)
+    ]
+
+
+def answer_access(role: str, children: List[dict], used_memory: bool) -> List[str]:
+    """
+    Roles allowed to reuse an answer: those that can read every chunk it
+    was generated from. Answers that drew on conversation memory, or on no
+    retrieved context at all, stay private to the asking role.
+    """
+    if used_memory or not children or role not in RBAC_ROLES:
+        return [role]
+
+    return [
+        r for r in RBAC_ROLES
+        if r == role or all(c["metadata"].get(r) is True for c in children)
+    ]
@@ -0,0 +1,124 @@
+import hashlib
+import numpy as np
+from typing import Dict, List, Optional
+from app.cache.redis_client import async_redis_binary_client
+from app.cache.lru import LRUCache
+from app.cache.normalize import normalize_question
+from app.core.config import EMBEDDING_CACHE_LOCAL_SIZE, EMBEDDING_CACHE_TTL
+
+local_cache = LRUCache(EMBEDDING_CACHE_LOCAL_SIZE)
+
+_stats = {
+    "local_hits": 0,
+    "redis_hits": 0,
+    "misses": 0
+}
+
+
+def make_embedding_key(model: str, text: str) -> str:
+    h = hashlib.md5(normalize_question(text).encode()).hexdigest()
+    return f"embedding_cache:{model}:{h}"
+
+
+async def aembedding_cache_get(model: str, text: str) -> Optional[list]:
+    """
+    L1: in-process LRU. L2: Redis, value is raw little-endian float32 bytes.
+    """
+    key = make_embedding_key(model, text)
+
+    embedding = local_cache.get(key)
+    if embedding is not None:
+        _stats["local_hits"] += 1
+        return embedding
+
+    if async_redis_binary_client is not None:
+        try:
+            raw = await async_redis_binary_client.get(key)
+            if raw is not None:
+                embedding = np.frombuffer(raw, dtype="<f4").tolist()
+                local_cache.set(key, embedding)
+                _stats["redis_hits"] += 1
+                return embedding
+
+        except Exception as e:
+            print("Embedding cache lookup failed:", e)
+
+    _stats["misses"] += 1
+    return None
+
+
+async def aembedding_cache_get_many(model: str, texts: List[str]) -> List[Optional[list]]:
+    """
+    Bulk lookup: local cache first, the rest in one MGET.
+    """
+    keys = [make_embedding_key(model, t) for t in texts]
+    embeddings = [local_cache.get(key) for key in keys]
+    _stats["local_hits"] += sum(e is not None for e in embeddings)
+
+    missing = [i for i, e in enumerate(embeddings) if e is None]
+    if missing and async_redis_binary_client is not None:
+        try:
+            raw = await async_redis_binary_client.mget([keys[i] for i in missing])
+            for i, value in zip(missing, raw):
+                if value is None:
+                    continue
+                embeddings[i] = np.frombuffer(value, dtype="<f4").tolist()
+                local_cache.set(keys[i], embeddings[i])
+                _stats["redis_hits"] += 1
+
+        except Exception as e:
+            print("Embedding cache lookup failed:", e)
+
+    _stats["misses"] += sum(e is None for e in embeddings)
+    return embeddings
+
+
+async def aembedding_cache_store(model: str, text: str, embedding: list) -> None:
+    key = make_embedding_key(model, text)
+    local_cache.set(key, embedding)
+
+    if async_redis_binary_client is None:
+        return
+
+    try:
+        await async_redis_binary_client.set(
+            key,
+            np.asarray(embedding, dtype="<f4").tobytes(),
+            ex=EMBEDDING_CACHE_TTL
+        )
+
+    except Exception as e:
+        print("Embedding cache store failed:", e)
+
+
+async def aembedding_cache_store_many(model: str, texts: List[str], embeddings: List[list]) -> None:
+    keys = [make_embedding_key(model, t) for t in texts]
+    for key, embedding in zip(keys, embeddings):
+        local_cache.set(key, embedding)
+
+    if async_redis_binary_client is None or not keys:
+        return
+
+    try:
+        pipe = async_redis_binary_client.pipeline(transaction=False)
+        for key, embedding in zip(keys, embeddings):
+            pipe.set(
+                key,
+                np.asarray(embedding, dtype="<f4").tobytes(),
+                ex=EMBEDDING_CACHE_TTL
+            )
+        await pipe.execute()
+
+    except Exception as e:
+        print("Embedding cache store failed:", e)
+
+
+def embedding_cache_stats() -> Dict:
+    lookups = sum(_stats.values())
+    hits = _stats["local_hits"] + _stats["redis_hits"]
+    return {
+        **_stats,
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        "local_entries": len(local_cache),
+        "local_capacity": local_cache.max_size
+    }
@@ -0,0 +1,82 @@
+import json
+from typing import List, Optional
+from app.cache.redis_client import async_redis_client
+from app.cache.lru import LRUCache
+from app.cache.normalize import question_hash
+from app.cache.access import access_label, readable_partitions
+from app.cache.index_version import (
+    get_index_version,
+    register_versioned_namespace
+)
+from app.core.config import (
+    EXACT_CACHE_TTL,
+    EXACT_CACHE_LOCAL_SIZE,
+    EXACT_CACHE_LOCAL_TTL
+)
+
+# Short local TTL so a worker never serves an answer long after Redis
+# dropped it.
+local_cache = LRUCache(EXACT_CACHE_LOCAL_SIZE, ttl=EXACT_CACHE_LOCAL_TTL)
+
+register_versioned_namespace("exact_cache")
+
+
+def make_exact_key(label: str, question: str) -> str:
+    return (
+        f"exact_cache:{get_index_version()}:{label}:"
+        f"{question_hash(question)}"
+    )
+
+
+def _local_lookup(keys: List[str]) -> Optional[dict]:
+    for key in keys:
+        answer = local_cache.get(key)
+        if answer is not None:
+            return answer
+    return None
+
+
+def _first_hit(keys: List[str], values) -> Optional[dict]:
+    for key, raw in zip(keys, values):
+        if raw is None:
+            continue
+
+        answer = json.loads(raw)
+        local_cache.set(key, answer)
+        return answer
+
+    return None
+
+
+async def aexact_cache_lookup(role: str, question: str) -> Optional[dict]:
+    """
+    First cache tier: access set + normalized question hash. Needs no
+    embedding. Checks every access set the role belongs to.
+    """
+    keys = [make_exact_key(label, question) for label in readable_partitions(role)]
+
+    answer = _local_lookup(keys)
+    if answer is not None or async_redis_client is None:
+        return answer
+
+    try:
+        return _first_hit(keys, await async_redis_client.mget(keys))
+
+    except Exception as e:
+        print("Exact cache lookup failed:", e)
+
+    return None
+
+
+async def astore_exact_cache(access: List[str], question: str, answer: dict) -> None:
+    key = make_exact_key(access_label(access), question)
+    local_cache.set(key, answer)
+
+    if async_redis_client is None:
+        return
+
+    try:
+        await async_redis_client.set(key, json.dumps(answer), ex=EXACT_CACHE_TTL)
+
+    except Exception as e:
+        print("Exact cache store failed:", e)
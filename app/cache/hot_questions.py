@@ -0,0 +1,101 @@
+import time
+import threading
+from collections import Counter
+from typing import List
+from app.cache.redis_client import redis_client
+from app.cache.normalize import normalize_question
+from app.core.config import HOT_QUESTIONS_MAX, HOT_QUESTIONS_FLUSH_SECONDS
+
+_lock = threading.Lock()
+_pending: Counter = Counter()
+# Last wording seen per normalized question, so warm-up replays what users sent
+_originals = {}
+_flusher = None
+
+
+def _hot_key(role: str) -> str:
+    return f"rag:hot_questions:{role}"
+
+
+def _text_key(role: str) -> str:
+    return f"rag:hot_questions:{role}:text"
+
+
+def record_question(role: str, question: str):
+    """
+    Counts a question locally; counts reach Redis in periodic batches so
+    the request path never waits on it.
+    """
+    global _flusher
+
+    if redis_client is None:
+        return
+
+    with _lock:
+        key = (role, normalize_question(question))
+        _pending[key] += 1
+        _originals[key] = question
+
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_flush_loop,
+                name="hot-questions-flush",
+                daemon=True
+            )
+            _flusher.start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(HOT_QUESTIONS_FLUSH_SECONDS)
+        flush_hot_questions()
+
+
+def flush_hot_questions():
+    with _lock:
+        batch = dict(_pending)
+        originals = dict(_originals)
+        _pending.clear()
+        _originals.clear()
+
+    if not batch:
+        return
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        roles = set()
+        for (role, question), count in batch.items():
+            pipe.zincrby(_hot_key(role), count, question)
+            pipe.hset(_text_key(role), question, originals[(role, question)])
+            roles.add(role)
+        roles = sorted(roles)
+        for role in roles:
+            pipe.zrange(_hot_key(role), 0, -(HOT_QUESTIONS_MAX + 1))
+        trimmed = pipe.execute()[-len(roles):]
+
+        # Drop the questions that fell out of the top list with their text
+        pipe = redis_client.pipeline(transaction=False)
+        for role, questions in zip(roles, trimmed):
+            if questions:
+                pipe.zrem(_hot_key(role), *questions)
+                pipe.hdel(_text_key(role), *questions)
+        pipe.execute()
+
+    except Exception as e:
+        print("Hot question flush failed:", e)
+
+
+def top_questions(role: str, n: int) -> List[str]:
+    """
+    Most asked questions for a role, in the wording users last sent them.
+    """
+    if redis_client is None:
+        return []
+    questions = redis_client.zrevrange(_hot_key(role), 0, n - 1)
+    if not questions:
+        return []
+    originals = redis_client.hmget(_text_key(role), questions)
+    return [
+        original or question
+        for question, original in zip(questions, originals)
+    ]
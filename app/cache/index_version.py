@@ -0,0 +1,235 @@
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+from app.cache.redis_client import redis_client, async_redis_client
+from app.core.config import INDEX_VERSION_REFRESH_SECONDS
+
+INDEX_VERSION_KEY = "rag:index_version"
+PENDING_INDEX_VERSION_KEY = "rag:index_version:pending"
+KNOWN_VERSIONS_KEY = "rag:index_versions"
+GC_LOCK_KEY = "rag:index_gc_lock"
+DEFAULT_INDEX_VERSION = "0"
+
+GC_BATCH_SIZE = 500
+GC_PAUSE_SECONDS = 0.05
+GC_LOCK_TTL = 600
+
+_lock = threading.Lock()
+_current = {
+    "version": DEFAULT_INDEX_VERSION,
+    "checked_at": 0.0
+}
+_refresher = {"task": None}
+_override: ContextVar[Optional[str]] = ContextVar(
+    "index_version_override", default=None
+)
+
+# Key prefixes laid out as "{prefix}:{version}:..." by the cache modules
+_namespaces: List[str] = []
+_listeners: List[Callable[[str], None]] = []
+
+
+def register_versioned_namespace(prefix: str):
+    if prefix not in _namespaces:
+        _namespaces.append(prefix)
+
+
+def on_index_version_change(callback: Callable[[str], None]):
+    _listeners.append(callback)
+
+
+@contextmanager
+def use_index_version(version: Optional[str]):
+    """
+    Serves every cache layer from `version` for the current context
+    (None keeps the active one). Used to pre-warm a staged corpus before
+    it goes live.
+    """
+    token = _override.set(version)
+    try:
+        yield
+    finally:
+        _override.reset(token)
+
+
+def get_index_version() -> str:
+    """
+    Version of the corpus currently served from Pinecone. In the API the
+    refresher task keeps it current and this only reads the cached value;
+    scripts without the refresher re-read it from Redis at most every
+    INDEX_VERSION_REFRESH_SECONDS.
+    """
+    override = _override.get()
+    if override is not None:
+        return override
+
+    if redis_client is None or _refreshing():
+        return _current["version"]
+
+    now = time.monotonic()
+    if now - _current["checked_at"] < INDEX_VERSION_REFRESH_SECONDS:
+        return _current["version"]
+
+    with _lock:
+        if now - _current["checked_at"] >= INDEX_VERSION_REFRESH_SECONDS:
+            try:
+                _set_version(redis_client.get(INDEX_VERSION_KEY))
+            except Exception as e:
+                print("Index version lookup failed:", e)
+            _current["checked_at"] = now
+
+    return _current["version"]
+
+
+def _refreshing() -> bool:
+    task = _refresher["task"]
+    return task is not None and not task.done()
+
+
+def _set_version(version: Optional[str]):
+    version = version or DEFAULT_INDEX_VERSION
+    if version == _current["version"]:
+        return
+    _current["version"] = version
+    _handle_version_change(version)
+
+
+async def arefresh_index_version():
+    try:
+        _set_version(await async_redis_client.get(INDEX_VERSION_KEY))
+    except Exception as e:
+        print("Index version lookup failed:", e)
+    _current["checked_at"] = time.monotonic()
+
+
+async def index_version_refresher():
+    while True:
+        await asyncio.sleep(INDEX_VERSION_REFRESH_SECONDS)
+        await arefresh_index_version()
+
+
+async def start_index_version_refresher():
+    """
+    Reads the version once, so the first requests already use it, then
+    keeps re-reading it in the background.
+    """
+    if async_redis_client is None or _refreshing():
+        return
+    await arefresh_index_version()
+    _refresher["task"] = asyncio.create_task(index_version_refresher())
+
+
+async def stop_index_version_refresher():
+    task = _refresher["task"]
+    if task is None:
+        return
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    _refresher["task"] = None
+
+
+def get_pending_index_version() -> Optional[str]:
+    if redis_client is None:
+        return None
+    return redis_client.get(PENDING_INDEX_VERSION_KEY)
+
+
+def publish_index_version(version: str, activate: bool = True):
+    """
+    Records a corpus version. With activate=False it is only staged as
+    pending so caches can be warmed before cut-over.
+    """
+    if redis_client is None:
+        return
+
+    pipe = redis_client.pipeline()
+    # The default namespace is registered too so unversioned entries
+    # written before the first publish get collected
+    pipe.sadd(KNOWN_VERSIONS_KEY, version, DEFAULT_INDEX_VERSION)
+    if activate:
+        pipe.set(INDEX_VERSION_KEY, version)
+        pipe.delete(PENDING_INDEX_VERSION_KEY)
+    else:
+        pipe.set(PENDING_INDEX_VERSION_KEY, version)
+    pipe.execute()
+
+    if activate:
+        _set_version(version)
+        _current["checked_at"] = time.monotonic()
+
+
+def _handle_version_change(version: str):
+    print(f"🔄 Index version is now {version}")
+
+    for callback in _listeners:
+        try:
+            callback(version)
+        except Exception as e:
+            print("Index version listener failed:", e)
+
+    threading.Thread(
+        target=collect_stale_namespaces,
+        name="index-version-gc",
+        daemon=True
+    ).start()
+
+
+def collect_stale_namespaces() -> int:
+    """
+    Deletes cache keys of every known version other than the active and
+    pending ones, in small batches. Only one worker runs it at a time.
+    """
+    if redis_client is None:
+        return 0
+
+    try:
+        if not redis_client.set(GC_LOCK_KEY, "1", nx=True, ex=GC_LOCK_TTL):
+            return 0
+    except Exception as e:
+        print("Index version GC failed:", e)
+        return 0
+
+    try:
+        keep = {
+            redis_client.get(INDEX_VERSION_KEY) or DEFAULT_INDEX_VERSION,
+            redis_client.get(PENDING_INDEX_VERSION_KEY)
+        }
+        stale = [
+            v for v in redis_client.smembers(KNOWN_VERSIONS_KEY)
+            if v not in keep
+        ]
+
+        deleted = 0
+        for version in stale:
+            for prefix in _namespaces:
+                batch = []
+                for key in redis_client.scan_iter(
+                    f"{prefix}:{version}:*", count=GC_BATCH_SIZE
+                ):
+                    batch.append(key)
+                    if len(batch) >= GC_BATCH_SIZE:
+                        deleted += redis_client.unlink(*batch)
+                        batch = []
+                        time.sleep(GC_PAUSE_SECONDS)
+                if batch:
+                    deleted += redis_client.unlink(*batch)
+
+            redis_client.srem(KNOWN_VERSIONS_KEY, version)
+
+        if deleted:
+            print(f"🧹 Removed {deleted} cache keys from {len(stale)} old index versions")
+        return deleted
+
+    except Exception as e:
+        print("Index version GC failed:", e)
+        return 0
+
+    finally:
+        redis_client.delete(GC_LOCK_KEY)
@@ -1,8 +1,7 @@
 import json
-import time
 from typing import List, Dict
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from app.cache.redis_client import redis_client
+from app.cache.redis_client import async_redis_client
 
 MAX_TURNS = 5
 KEEP_AFTER_SUMMARY = 2
@@ -11,6 +10,50 @@ TTL_SECONDS = 300
 
 SYSTEM_PROMPT = "You are a helpful AI assistant."
 
+# Turns staged by the request path wait in a hash keyed by sequence
+# number until the bookkeeping worker, or the next read of the session,
+# moves them onto the turns list. Both steps are atomic, so turns land
+# once and in order whoever gets there first.
+#
+# KEYS: seq counter, pending
+# ARGV: turn, ttl
+_STAGE_SCRIPT = """
+local ttl = tonumber(ARGV[2])
+local seq = redis.call('INCR', KEYS[1])
+redis.call('HSET', KEYS[2], seq, ARGV[1])
+redis.call('EXPIRE', KEYS[1], ttl)
+redis.call('EXPIRE', KEYS[2], ttl)
+return seq
+"""
+
+# KEYS: turns, summary, pending
+# ARGV: ttl
+_FLUSH_SCRIPT = """
+local raw = redis.call('HGETALL', KEYS[3])
+if #raw == 0 then
+    return 0
+end
+
+local staged = {}
+for i = 1, #raw, 2 do
+    table.insert(staged, {tonumber(raw[i]), raw[i + 1]})
+end
+table.sort(staged, function(a, b) return a[1] < b[1] end)
+
+for _, entry in ipairs(staged) do
+    redis.call('RPUSH', KEYS[1], entry[2])
+end
+redis.call('DEL', KEYS[3])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[1]))
+return #staged
+"""
+
+_astage = _aflush = None
+if async_redis_client is not None:
+    _astage = async_redis_client.register_script(_STAGE_SCRIPT)
+    _aflush = async_redis_client.register_script(_FLUSH_SCRIPT)
+
 
 def _turns_key(session_id: str) -> str:
     return f"chat:{session_id}:turns"
@@ -20,33 +63,80 @@ def _summary_key(session_id: str) -> str:
     return f"chat:{session_id}:summary"
 
 
-def get_turns(session_id: str) -> List[Dict]:
-    if redis_client is None:
+def _seq_key(session_id: str) -> str:
+    return f"chat:{session_id}:seq"
+
+
+def _pending_key(session_id: str) -> str:
+    return f"chat:{session_id}:pending"
+
+
+def _flush_call(session_id: str) -> Dict:
+    return {
+        "keys": [
+            _turns_key(session_id),
+            _summary_key(session_id),
+            _pending_key(session_id)
+        ],
+        "args": [TTL_SECONDS]
+    }
+
+
+async def aget_turns(session_id: str) -> List[Dict]:
+    if async_redis_client is None:
         return []
 
-    raw = redis_client.lrange(_turns_key(session_id), 0, -1)
+    raw = await async_redis_client.lrange(_turns_key(session_id), 0, -1)
     return [json.loads(t) for t in raw]
 
 
-def get_summary(session_id: str) -> str:
-    if redis_client is None:
+async def aget_summary(session_id: str) -> str:
+    if async_redis_client is None:
         return ""
 
-    return redis_client.get(_summary_key(session_id)) or ""
+    return await async_redis_client.get(_summary_key(session_id)) or ""
+
+
+async def ahas_memory(session_id: str) -> bool:
+    """
+    Whether the session has any turns (flushed or staged) or a summary,
+    i.e. whether an answer for it may depend on its history.
+    """
+    if async_redis_client is None:
+        return False
 
+    return await async_redis_client.exists(
+        _turns_key(session_id),
+        _summary_key(session_id),
+        _pending_key(session_id)
+    ) > 0
 
-def store_turn(session_id: str, turn: Dict):
-    if redis_client is None:
+
+async def astage_turn(session_id: str, turn: Dict):
+    """
+    Records a turn without touching the turns list; see aflush_turns.
+    """
+    if async_redis_client is None:
         return
 
-    key = _turns_key(session_id)
-    redis_client.rpush(key, json.dumps(turn))
-    redis_client.expire(key, TTL_SECONDS)
-    redis_client.expire(_summary_key(session_id), TTL_SECONDS)
+    await _astage(
+        keys=[_seq_key(session_id), _pending_key(session_id)],
+        args=[json.dumps(turn), TTL_SECONDS]
+    )
 
 
-def update_summary_batch(
-    llm,
+async def aflush_turns(session_id: str) -> int:
+    """
+    Moves staged turns onto the turns list in sequence order. Returns
+    how many were moved.
+    """
+    if async_redis_client is None:
+        return 0
+
+    return await _aflush(**_flush_call(session_id))
+
+
+def _summary_prompt(
     existing_summary: str,
     turns_to_summarize: List[Dict]
 ) -> str:
@@ -79,40 +169,63 @@ New conversation turns:
 Return a single updated summary only.
 """.strip()
 
-    response = llm.invoke([HumanMessage(content=prompt)])
+    return prompt
+
+
+async def aupdate_summary_batch(
+    llm,
+    existing_summary: str,
+    turns_to_summarize: List[Dict]
+) -> str:
+    prompt = _summary_prompt(existing_summary, turns_to_summarize)
+    response = await llm.ainvoke([HumanMessage(content=prompt)])
     return response.content.strip()
 
 
-def build_memory_context(
-    session_id: str,
-) -> List:
-    """
-    Returns list of LangChain messages representing memory context.
-    """
+def _memory_messages(summary: str, turns: List[Dict]) -> List:
     messages = [SystemMessage(content=SYSTEM_PROMPT)]
 
-    summary = get_summary(session_id)
     if summary:
         messages.append(
             SystemMessage(content=f"Conversation summary:\n{summary}")
         )
 
-    for t in get_turns(session_id):
+    for t in turns:
         messages.append(HumanMessage(content=t["user"]))
         messages.append(AIMessage(content=t["assistant"]))
 
     return messages
 
 
+async def abuild_memory_context(
+    session_id: str,
+) -> List:
+    """
+    Returns list of LangChain messages representing memory context.
+    """
+    if async_redis_client is None:
+        return _memory_messages("", [])
+
+    # Turns staged by earlier requests may not be flushed by the worker
+    # yet; flushing here first keeps the session read-your-writes.
+    await aflush_turns(session_id)
+
+    pipe = async_redis_client.pipeline(transaction=False)
+    pipe.get(_summary_key(session_id))
+    pipe.lrange(_turns_key(session_id), 0, -1)
+    summary, raw = await pipe.execute()
 
-def maybe_summarize(
+    return _memory_messages(summary or "", [json.loads(t) for t in raw])
+
+
+async def amaybe_summarize(
     session_id: str,
     llm
 ):
-    if redis_client is None:
+    if async_redis_client is None:
         return
 
-    turns = get_turns(session_id)
+    turns = await aget_turns(session_id)
 
     if len(turns) <= SUMMARY_TRIGGER:
         return
@@ -120,16 +233,13 @@ def maybe_summarize(
     num_to_summarize = len(turns) - KEEP_AFTER_SUMMARY
     turns_to_summarize = turns[:num_to_summarize]
 
-    updated_summary = update_summary_batch(
+    updated_summary = await aupdate_summary_batch(
         llm,
-        get_summary(session_id),
+        await aget_summary(session_id),
         turns_to_summarize
     )
 
-    redis_client.set(_summary_key(session_id), updated_summary)
-
-    redis_client.ltrim(
-        _turns_key(session_id),
-        num_to_summarize,
-        -1
-    )
+    pipe = async_redis_client.pipeline(transaction=False)
+    pipe.set(_summary_key(session_id), updated_summary)
+    pipe.ltrim(_turns_key(session_id), num_to_summarize, -1)
+    await pipe.execute()
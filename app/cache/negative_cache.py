@@ -0,0 +1,94 @@
+import time
+from app.cache.redis_client import async_redis_client
+from app.cache.normalize import question_hash
+from app.cache.semantic_index import SemanticIndex
+from app.cache.index_version import (
+    get_index_version,
+    register_versioned_namespace,
+    on_index_version_change
+)
+from app.core.config import (
+    NEGATIVE_CACHE_TTL,
+    NEGATIVE_CACHE_THRESHOLD,
+    NEGATIVE_CACHE_MAX_ENTRIES,
+    SEMANTIC_INDEX_RESYNC_SECONDS
+)
+
+# Questions that produced no usable context for a role. Kept short-lived:
+# a new document or a threshold change should not stay hidden for long,
+# so a hit reads the entry without extending its TTL.
+negative_index = SemanticIndex(
+    "negative_cache",
+    NEGATIVE_CACHE_TTL,
+    policy="lru",
+    max_entries=lambda partition: NEGATIVE_CACHE_MAX_ENTRIES,
+    resync_seconds=SEMANTIC_INDEX_RESYNC_SECONDS
+)
+
+for _prefix in negative_index.namespaces:
+    register_versioned_namespace(_prefix)
+
+on_index_version_change(lambda version: negative_index.retain(f"{version}:"))
+
+
+def _partition(role: str) -> str:
+    return f"{get_index_version()}:{role}"
+
+
+def make_negative_key(role: str, question: str) -> str:
+    return f"negative_cache:{_partition(role)}:{question_hash(question)}"
+
+
+async def anegative_cache_lookup_exact(role: str, question: str) -> bool:
+    if async_redis_client is None:
+        return False
+
+    try:
+        return bool(await async_redis_client.exists(make_negative_key(role, question)))
+
+    except Exception as e:
+        print("Negative cache lookup failed:", e)
+
+    return False
+
+
+async def anegative_cache_lookup_semantic(role: str, query_embedding: list) -> bool:
+    if async_redis_client is None:
+        return False
+
+    try:
+        partition, key, score = await negative_index.alookup(
+            [_partition(role)], query_embedding
+        )
+        if key is None or score < NEGATIVE_CACHE_THRESHOLD:
+            return False
+
+        return await negative_index.apeek(partition, key, "ts") is not None
+
+    except Exception as e:
+        print("Negative cache lookup failed:", e)
+
+    return False
+
+
+def _payload(question: str) -> dict:
+    return {
+        "question": question,
+        "ts": time.time()
+    }
+
+
+async def astore_negative_cache(role: str, question: str, embedding: list) -> None:
+    if async_redis_client is None:
+        return
+
+    try:
+        await negative_index.astore(
+            _partition(role),
+            make_negative_key(role, question),
+            embedding,
+            _payload(question)
+        )
+
+    except Exception as e:
+        print("Negative cache store failed:", e)
@@ -0,0 +1,19 @@
+import re
+import hashlib
+
+_APOSTROPHES = re.compile(r"['’]")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_question(text: str) -> str:
+    """
+    Canonical form used by exact-match keys: lowercase, punctuation
+    stripped, whitespace collapsed.
+    """
+    text = _APOSTROPHES.sub("", text.lower())
+    text = _PUNCTUATION.sub(" ", text)
+    return " ".join(text.split())
+
+
+def question_hash(text: str) -> str:
+    return hashlib.md5(normalize_question(text).encode()).hexdigest()
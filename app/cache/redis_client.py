@@ -1,4 +1,5 @@
 import redis
+import redis.asyncio as redis_asyncio
 
 from app.core.config import (
     REDIS_HOST,
@@ -8,23 +9,52 @@ from app.core.config import (
 )
 
 redis_client = None
+# Same server, raw bytes in and out (binary embedding values)
+redis_binary_client = None
+# asyncio clients for the request path; connections are opened lazily on
+# the event loop that first uses them
+async_redis_client = None
+async_redis_binary_client = None
+
+
+def _connect(decode_responses: bool) -> redis.Redis:
+    return redis.Redis(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        username=REDIS_USERNAME,
+        password=REDIS_PASSWORD,
+        decode_responses=decode_responses,
+        socket_connect_timeout=2,
+        socket_timeout=2,
+    )
+
+
+def _connect_async(decode_responses: bool) -> redis_asyncio.Redis:
+    return redis_asyncio.Redis(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        username=REDIS_USERNAME,
+        password=REDIS_PASSWORD,
+        decode_responses=decode_responses,
+        socket_connect_timeout=2,
+        socket_timeout=2,
+    )
+
 
 try:
     if REDIS_HOST and REDIS_PASSWORD:
-        redis_client = redis.Redis(
-            host=REDIS_HOST,
-            port=REDIS_PORT,
-            username=REDIS_USERNAME,
-            password=REDIS_PASSWORD,
-            decode_responses=True,
-            socket_connect_timeout=2,
-            socket_timeout=2,
-        )
+        redis_client = _connect(decode_responses=True)
         redis_client.ping()
+        redis_binary_client = _connect(decode_responses=False)
+        async_redis_client = _connect_async(decode_responses=True)
+        async_redis_binary_client = _connect_async(decode_responses=False)
         print("✅ Redis connected")
     else:
         print("⚠️ Redis config missing (check .env)")
 
 except Exception as e:
     redis_client = None
+    redis_binary_client = None
+    async_redis_client = None
+    async_redis_binary_client = None
     print("⚠️ Redis unavailable:", e)
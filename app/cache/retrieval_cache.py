@@ -0,0 +1,74 @@
+import json
+from typing import List, Optional
+from app.cache.redis_client import async_redis_client
+from app.cache.index_version import (
+    get_index_version,
+    register_versioned_namespace
+)
+from app.cache.normalize import question_hash
+from app.core.config import RETRIEVAL_CACHE_TTL
+
+register_versioned_namespace("retrieval_cache")
+
+
+def make_retrieval_key(role: str, question: str) -> str:
+    return (
+        f"retrieval_cache:{get_index_version()}:{role}:"
+        f"{question_hash(question)}"
+    )
+
+
+async def aretrieval_cache_lookup(role: str, question: str) -> Optional[List[dict]]:
+    """
+    Returns the reranked children previously selected for this question,
+    or None. Keys embed the index version, so a re-ingestion invalidates
+    every entry without a flush.
+    """
+    if async_redis_client is None:
+        return None
+
+    try:
+        raw = await async_redis_client.get(make_retrieval_key(role, question))
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    except Exception as e:
+        print("Retrieval cache lookup failed:", e)
+
+    return None
+
+
+def _serialize(top_children: List[dict]) -> str:
+    children = []
+    for c in top_children:
+        meta = {k: v for k, v in c["metadata"].items() if k != "text"}
+        children.append({
+            "id": c["id"],
+            "chunk": c["chunk"],
+            "metadata": meta,
+            "score": c.get("score"),
+            "rerank_score": c.get("rerank_score")
+        })
+    return json.dumps(children)
+
+
+async def astore_retrieval_cache(
+    role: str,
+    question: str,
+    top_children: List[dict],
+    ttl: Optional[int] = None
+) -> None:
+
+    if async_redis_client is None or not top_children:
+        return
+
+    try:
+        await async_redis_client.set(
+            make_retrieval_key(role, question),
+            _serialize(top_children),
+            ex=ttl or RETRIEVAL_CACHE_TTL
+        )
+
+    except Exception as e:
+        print("Retrieval cache store failed:", e)
@@ -1,56 +1,87 @@
 import json
 import time
+import asyncio
 import hashlib
 import numpy as np
-from typing import Optional, Tuple
-from app.cache.redis_client import redis_client
-from app.core.config import SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL
+from typing import Dict, List, Optional, Tuple
+from app.cache.redis_client import async_redis_client
+from app.cache.access import (
+    access_label,
+    readable_partitions,
+    all_partitions
+)
+from app.cache.semantic_index import SemanticIndex
+from app.cache.index_version import (
+    get_index_version,
+    register_versioned_namespace,
+    on_index_version_change
+)
+from app.core.config import (
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_ROLE_QUOTAS,
+    SEMANTIC_CACHE_EVICTION,
+    SEMANTIC_INDEX_RESYNC_SECONDS
+)
 
 SIM_THRESHOLD = SEMANTIC_CACHE_THRESHOLD
 CACHE_TTL = SEMANTIC_CACHE_TTL
 
+
+def _partition_quota(partition: str) -> int:
+    label = partition.split(":", 1)[-1]
+    return SEMANTIC_CACHE_ROLE_QUOTAS.get(label, SEMANTIC_CACHE_MAX_ENTRIES)
+
+
+semantic_index = SemanticIndex(
+    "semantic_cache",
+    CACHE_TTL,
+    policy=SEMANTIC_CACHE_EVICTION,
+    max_entries=_partition_quota,
+    resync_seconds=SEMANTIC_INDEX_RESYNC_SECONDS
+)
+
+for _prefix in semantic_index.namespaces:
+    register_versioned_namespace(_prefix)
+
+on_index_version_change(lambda version: semantic_index.retain(f"{version}:"))
+
 def cosine_sim(a, b) -> float:
     a = np.array(a)
     b = np.array(b)
     return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
 
 
-def make_cache_key(role: str, text: str) -> str:
+def make_cache_key(access: List[str], text: str) -> str:
     h = hashlib.md5(text.encode()).hexdigest()
-    return f"semantic_cache:{role}:{h}"
+    return f"semantic_cache:{_partition(access_label(access))}:{h}"
+
+
+def _partition(label: str) -> str:
+    return f"{get_index_version()}:{label}"
 
 
-def semantic_cache_lookup(
+async def asemantic_cache_lookup(
     role: str,
     query_embedding: list
 ) -> Tuple[Optional[dict], Optional[float]]:
 
-    if redis_client is None:
+    if async_redis_client is None:
         return None, None
 
-    pattern = f"semantic_cache:{role}:*"
-    best_match = None
-    best_score = 0.0
-
     try:
-        for key in redis_client.scan_iter(pattern):
-            data = redis_client.hgetall(key)
-            if not data or "embedding" not in data:
-                continue
-
-            cached_emb = json.loads(data["embedding"])
-            score = cosine_sim(query_embedding, cached_emb)
-
-            if score > best_score:
-                best_score = score
-                best_match = data
-
-        if best_score >= SIM_THRESHOLD and best_match:
-            print(
-                f"\n⚡ REDIS SEMANTIC CACHE HIT"
-                f"\n📊 Similarity: {best_score:.3f}"
-            )
-            return json.loads(best_match["answer"]), best_score
+        partitions = [_partition(label) for label in readable_partitions(role)]
+        partition, key, best_score = await semantic_index.alookup(
+            partitions, query_embedding
+        )
+
+        if key is None or best_score < SIM_THRESHOLD:
+            await semantic_index.arecord_miss(_partition(role))
+            return None, None
+
+        answer = await semantic_index.afetch(partition, key, "answer", _partition(role))
+        return _hit(answer, best_score)
 
     except Exception as e:
         print("Semantic cache lookup failed:", e)
@@ -58,27 +89,101 @@ def semantic_cache_lookup(
     return None, None
 
 
-def store_semantic_cache(
+async def asemantic_cache_lookup_many(
     role: str,
+    query_embeddings: List[list]
+) -> List[Tuple[Optional[dict], Optional[float]]]:
+    """
+    Bulk variant for batch requests: one index sync, one matrix product
+    per query, and the hit entries fetched concurrently.
+    """
+    misses = [(None, None) for _ in query_embeddings]
+    if async_redis_client is None or not query_embeddings:
+        return misses
+
+    try:
+        partitions = [_partition(label) for label in readable_partitions(role)]
+        matches = await semantic_index.alookup_many(partitions, query_embeddings)
+
+        hits = [
+            (i, partition, key, score)
+            for i, (partition, key, score) in enumerate(matches)
+            if key is not None and score >= SIM_THRESHOLD
+        ]
+        if len(hits) < len(matches):
+            await semantic_index.arecord_miss(
+                _partition(role), len(matches) - len(hits)
+            )
+
+        answers = await asyncio.gather(*[
+            semantic_index.afetch(partition, key, "answer", _partition(role))
+            for _, partition, key, _ in hits
+        ])
+
+        results = list(misses)
+        for (i, _, _, score), answer in zip(hits, answers):
+            results[i] = _hit(answer, score)
+        return results
+
+    except Exception as e:
+        print("Semantic cache lookup failed:", e)
+
+    return misses
+
+
+def _hit(answer: Optional[str], best_score: float) -> Tuple[Optional[dict], Optional[float]]:
+    if answer is None:
+        return None, None
+
+    print(
+        f"\n⚡ REDIS SEMANTIC CACHE HIT"
+        f"\n📊 Similarity: {best_score:.3f}"
+    )
+    return json.loads(answer), best_score
+
+
+def _payload(label: str, question: str, answer: dict) -> Dict:
+    return {
+        "access": label,
+        "question": question,
+        "answer": json.dumps(answer),
+        "ts": time.time(),
+        "hits": 0
+    }
+
+
+async def astore_semantic_cache(
+    access: List[str],
     question: str,
     embedding: list,
     answer: dict
 ) -> None:
 
-    if redis_client is None:
+    if async_redis_client is None:
         return
 
     try:
-        key = make_cache_key(role, question)
-        payload = {
-            "role": role,
-            "question": question,
-            "embedding": json.dumps(embedding),
-            "answer": json.dumps(answer),
-            "ts": time.time()
-        }
-        redis_client.hset(key, mapping=payload)
-        redis_client.expire(key, CACHE_TTL)
+        label = access_label(access)
+        evicted = await semantic_index.astore(
+            _partition(label),
+            make_cache_key(access, question),
+            embedding,
+            _payload(label, question, answer)
+        )
+        if evicted:
+            print(f"♻️ Semantic cache evicted {evicted} entries for {label}")
 
     except Exception as e:
         print("Semantic cache store failed:", e)
+
+
+def semantic_cache_stats() -> Dict:
+    """
+    Hits and misses are counted per requesting role (the single-role
+    labels), wherever the matched entry lives; residency and evictions
+    are per access-set partition.
+    """
+    return {
+        label: semantic_index.stats(_partition(label))
+        for label in all_partitions()
+    }
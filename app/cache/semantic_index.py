@@ -0,0 +1,517 @@
+import time
+import asyncio
+import threading
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+from app.cache.redis_client import (
+    redis_client,
+    async_redis_client,
+    async_redis_binary_client
+)
+
+# Hash field holding an entry's embedding as little-endian float32 bytes
+VECTOR_FIELD = "vector"
+
+# Writes an entry and publishes it under the next sequence number of its
+# partition, then enforces the partition quota. Everything runs atomically,
+# so a reader that sees version N finds every key with sequence <= N in the
+# membership set.
+#
+# KEYS: entry, version counter, members (by sequence), usage, stats
+# ARGV: ttl, now, policy, max_entries, field1, value1, ...
+_STORE_SCRIPT = """
+local key = KEYS[1]
+local ttl = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+local policy = ARGV[3]
+local max_entries = tonumber(ARGV[4])
+
+for i = 5, #ARGV, 2 do
+    redis.call('HSET', key, ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', key, ttl)
+
+local v = redis.call('INCR', KEYS[2])
+redis.call('ZADD', KEYS[3], v, key)
+if policy == 'lru' then
+    redis.call('ZADD', KEYS[4], now, key)
+else
+    -- LFU with dynamic aging: a new entry starts at the score of the last
+    -- entry evicted, plus one, so it is not the first to go and entries
+    -- whose hits stopped coming are overtaken as the age rises.
+    local age = tonumber(redis.call('HGET', KEYS[5], 'lfu_age') or '0')
+    redis.call('ZADD', KEYS[4], 'NX', age + 1, key)
+end
+
+-- Entries that expired on their own still sit in the usage set; they are
+-- the cheapest to reclaim, so check the coldest few first.
+for _, k in ipairs(redis.call('ZRANGE', KEYS[4], 0, 9)) do
+    if redis.call('EXISTS', k) == 0 then
+        redis.call('ZREM', KEYS[4], k)
+        redis.call('ZREM', KEYS[3], k)
+    end
+end
+
+local evicted = 0
+if max_entries > 0 then
+    local over = redis.call('ZCARD', KEYS[4]) - max_entries
+    if over > 0 then
+        local coldest = redis.call('ZRANGE', KEYS[4], 0, over, 'WITHSCORES')
+        local age = nil
+        for i = 1, #coldest, 2 do
+            local k = coldest[i]
+            if evicted < over and k ~= key then
+                redis.call('DEL', k)
+                redis.call('ZREM', KEYS[4], k)
+                redis.call('ZREM', KEYS[3], k)
+                evicted = evicted + 1
+                age = coldest[i + 1]
+            end
+        end
+        redis.call('HINCRBY', KEYS[5], 'evictions', evicted)
+        if policy ~= 'lru' and age then
+            redis.call('HSET', KEYS[5], 'lfu_age', age)
+        end
+    end
+end
+
+return {v, evicted}
+"""
+
+# Reads one field of a live entry and records the hit: per-entry hit count,
+# TTL extension, usage score and partition counters.
+#
+# KEYS: entry, usage, stats
+# ARGV: field, ttl, now, policy
+_HIT_SCRIPT = """
+local value = redis.call('HGET', KEYS[1], ARGV[1])
+if not value then
+    redis.call('HINCRBY', KEYS[3], 'misses', 1)
+    return false
+end
+
+redis.call('HINCRBY', KEYS[1], 'hits', 1)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+if ARGV[4] == 'lru' then
+    redis.call('ZADD', KEYS[2], tonumber(ARGV[3]), KEYS[1])
+else
+    redis.call('ZINCRBY', KEYS[2], 1, KEYS[1])
+end
+redis.call('HINCRBY', KEYS[3], 'hits', 1)
+return value
+"""
+
+
+class EmbeddingMatrix:
+    """
+    Growable float32 matrix of L2-normalized embeddings with one row per
+    cache key. Lookup is a single matrix-vector product.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._capacity = capacity
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _grow(self, dim: int):
+        if self._matrix is None:
+            self._matrix = np.zeros((self._capacity, dim), dtype=np.float32)
+            return
+
+        self._capacity *= 2
+        matrix = np.zeros((self._capacity, dim), dtype=np.float32)
+        matrix[:len(self.keys)] = self._matrix[:len(self.keys)]
+        self._matrix = matrix
+
+    def upsert(self, key: str, embedding):
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm == 0:
+            return
+        vec = vec / norm
+
+        row = self.rows.get(key)
+        if row is None:
+            if self._matrix is None or len(self.keys) == self._capacity:
+                self._grow(vec.shape[0])
+            row = len(self.keys)
+            self.keys.append(key)
+            self.rows[key] = row
+
+        self._matrix[row] = vec
+
+    def remove(self, key: str):
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+
+        last = len(self.keys) - 1
+        if row != last:
+            moved = self.keys[last]
+            self._matrix[row] = self._matrix[last]
+            self.keys[row] = moved
+            self.rows[moved] = row
+        self.keys.pop()
+
+    def best(self, query_embedding) -> Tuple[Optional[str], float]:
+        n = len(self.keys)
+        if n == 0:
+            return None, 0.0
+
+        q = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return None, 0.0
+
+        scores = self._matrix[:n] @ (q / norm)
+        idx = int(np.argmax(scores))
+        return self.keys[idx], float(scores[idx])
+
+    def clear(self):
+        self.keys = []
+        self.rows = {}
+
+
+class SemanticIndex:
+    """
+    Per-partition in-memory view of cache entries stored in Redis.
+
+    Redis stays the source of truth. Every write bumps a per-partition
+    version counter and records the key in a sorted set scored by that
+    version, so each worker can pull only the entries it has not seen yet.
+    A partition this worker has not loaded yet, and the periodic clean-up
+    of expired keys, are handled by background tasks; until a partition
+    is loaded its lookups miss. A second sorted set scores entries by recency (lru) or hit count (lfu,
+    with dynamic aging) and drives eviction once a partition exceeds its
+    quota.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        ttl: int,
+        policy: str = "lfu",
+        max_entries: Callable[[str], int] = lambda partition: 0,
+        resync_seconds: float = 300.0
+    ):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.policy = policy
+        self.max_entries = max_entries
+        self.resync_seconds = resync_seconds
+        self._lock = threading.Lock()
+        self._matrices: Dict[str, EmbeddingMatrix] = {}
+        self._versions: Dict[str, int] = {}
+        self._resynced_at: Dict[str, float] = {}
+        # One background load / resync per partition at a time
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._astore = self._ahit = None
+        if async_redis_client is not None:
+            self._astore = async_redis_client.register_script(_STORE_SCRIPT)
+            self._ahit = async_redis_client.register_script(_HIT_SCRIPT)
+
+    @property
+    def namespaces(self) -> List[str]:
+        return [
+            self.prefix,
+            f"{self.prefix}_version",
+            f"{self.prefix}_keys",
+            f"{self.prefix}_usage",
+            f"{self.prefix}_stats"
+        ]
+
+    def _version_key(self, partition: str) -> str:
+        return f"{self.prefix}_version:{partition}"
+
+    def _members_key(self, partition: str) -> str:
+        return f"{self.prefix}_keys:{partition}"
+
+    def _usage_key(self, partition: str) -> str:
+        return f"{self.prefix}_usage:{partition}"
+
+    def _stats_key(self, partition: str) -> str:
+        return f"{self.prefix}_stats:{partition}"
+
+    def _prepare(self, partition: str, remote_version: int) -> int:
+        """
+        Returns the local version to sync `partition` from. Caller holds
+        the lock.
+        """
+        matrix = self._matrices.setdefault(partition, EmbeddingMatrix())
+        local_version = self._versions.get(partition, 0)
+
+        if remote_version < local_version:
+            # Counter went backwards (Redis flush/restart): start over
+            matrix.clear()
+            local_version = 0
+            self._versions[partition] = 0
+
+        return local_version
+
+    def _apply(self, partition: str, remote_version: int, new_keys, rows) -> bool:
+        """
+        Applies entries pulled from Redis and reports whether a resync is
+        due. Caller holds the lock.
+        """
+        matrix = self._matrices.setdefault(partition, EmbeddingMatrix())
+        for key, vector in zip(new_keys, rows):
+            if vector is None:
+                matrix.remove(key)
+                continue
+            matrix.upsert(key, np.frombuffer(vector, dtype="<f4"))
+
+        self._versions[partition] = max(
+            self._versions.get(partition, 0), remote_version
+        )
+
+        last = self._resynced_at.get(partition)
+        if last is None:
+            self._resynced_at[partition] = time.monotonic()
+            return False
+        return time.monotonic() - last >= self.resync_seconds
+
+    def _apply_resync(self, partition: str, members, alive) -> List[str]:
+        """
+        Drops rows whose entries expired or were evicted by another worker.
+        Returns the dead keys still listed in Redis. Caller holds the lock.
+        """
+        live = {k for k, exists in zip(members, alive) if exists}
+        matrix = self._matrices.setdefault(partition, EmbeddingMatrix())
+        for key in [k for k in matrix.keys if k not in live]:
+            matrix.remove(key)
+
+        self._resynced_at[partition] = time.monotonic()
+        return [k for k, exists in zip(members, alive) if not exists]
+
+    async def _aresync(self, partition: str):
+        """
+        Cleans the membership and usage sets of expired keys and drops
+        their local rows.
+        """
+        members = await async_redis_client.zrange(
+            self._members_key(partition), 0, -1
+        )
+
+        pipe = async_redis_client.pipeline(transaction=False)
+        for key in members:
+            pipe.exists(key)
+        alive = await pipe.execute() if members else []
+
+        with self._lock:
+            dead = self._apply_resync(partition, members, alive)
+
+        if dead:
+            pipe = async_redis_client.pipeline(transaction=False)
+            pipe.zrem(self._members_key(partition), *dead)
+            pipe.zrem(self._usage_key(partition), *dead)
+            await pipe.execute()
+
+    async def _async_sync(self, partition: str, remote_version: int):
+        with self._lock:
+            local_version = self._prepare(partition, remote_version)
+
+        new_keys, rows = [], []
+        if remote_version > local_version:
+            new_keys = await async_redis_client.zrangebyscore(
+                self._members_key(partition),
+                f"({local_version}",
+                remote_version
+            )
+
+            pipe = async_redis_binary_client.pipeline(transaction=False)
+            for key in new_keys:
+                pipe.hget(key, VECTOR_FIELD)
+            rows = await pipe.execute() if new_keys else []
+
+        with self._lock:
+            resync_due = self._apply(partition, remote_version, new_keys, rows)
+
+        if resync_due:
+            self._background(partition, lambda: self._aresync(partition))
+
+    async def _aload(self, partition: str):
+        remote = await async_redis_client.get(self._version_key(partition))
+        await self._async_sync(partition, int(remote or 0))
+
+    def _background(self, partition: str, factory: Callable):
+        task = self._tasks.get(partition)
+        if task is not None and not task.done():
+            return
+        self._tasks[partition] = asyncio.get_running_loop().create_task(
+            self._run_background(factory)
+        )
+
+    async def _run_background(self, factory: Callable):
+        try:
+            await factory()
+        except Exception as e:
+            print(f"{self.prefix} index sync failed:", e)
+
+    def _search(self, partitions: List[str], query_embedding) -> Tuple[Optional[str], Optional[str], float]:
+        best_partition, best_key, best_score = None, None, 0.0
+        with self._lock:
+            for partition in partitions:
+                matrix = self._matrices.get(partition)
+                if matrix is None:
+                    continue
+
+                key, score = matrix.best(query_embedding)
+                if key is not None and score > best_score:
+                    best_partition, best_key, best_score = partition, key, score
+
+        return best_partition, best_key, best_score
+
+    async def alookup(
+        self,
+        partitions: List[str],
+        query_embedding
+    ) -> Tuple[Optional[str], Optional[str], float]:
+        """
+        Returns (partition, key, cosine similarity) of the closest entry
+        across `partitions`. Version counters are read in one round trip.
+        """
+        return (await self.alookup_many(partitions, [query_embedding]))[0]
+
+    async def alookup_many(
+        self,
+        partitions: List[str],
+        query_embeddings: List
+    ) -> List[Tuple[Optional[str], Optional[str], float]]:
+        """
+        Like alookup for several queries, with a single sync of the
+        partitions.
+        """
+        if async_redis_client is None or not partitions:
+            return [(None, None, 0.0) for _ in query_embeddings]
+
+        remote_versions = await async_redis_client.mget(
+            [self._version_key(p) for p in partitions]
+        )
+
+        for partition, remote in zip(partitions, remote_versions):
+            if partition not in self._versions:
+                # Not loaded in this worker yet: pulling every entry would
+                # stall the request, so it happens in the background
+                if remote is not None:
+                    self._background(partition, lambda p=partition: self._aload(p))
+                continue
+            await self._async_sync(partition, int(remote or 0))
+
+        return [self._search(partitions, q) for q in query_embeddings]
+
+    def _drop_missing(self, partition: str, key: str, value):
+        if value is None:
+            with self._lock:
+                matrix = self._matrices.get(partition)
+                if matrix is not None:
+                    matrix.remove(key)
+
+    async def afetch(
+        self,
+        partition: str,
+        key: str,
+        field: str,
+        stats_partition: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Reads `field` of a matched entry and records the hit (TTL extension,
+        usage score, counters). Hit/miss counters go to `stats_partition`
+        (default: the entry's own). Entries gone from Redis are dropped
+        locally.
+        """
+        stats_key = self._stats_key(stats_partition or partition)
+        value = await self._ahit(
+            keys=[key, self._usage_key(partition), stats_key],
+            args=[field, self.ttl, time.time(), self.policy]
+        )
+        self._drop_missing(partition, key, value)
+        return value
+
+    async def apeek(self, partition: str, key: str, field: str) -> Optional[str]:
+        """
+        Reads `field` of a matched entry without recording a hit: the TTL,
+        usage score and counters stay as they are.
+        """
+        value = await async_redis_client.hget(key, field)
+        self._drop_missing(partition, key, value)
+        return value
+
+    async def arecord_miss(self, partition: str, count: int = 1):
+        await async_redis_client.hincrby(self._stats_key(partition), "misses", count)
+
+    def retain(self, prefix: str):
+        """
+        Drops every local partition whose name does not start with `prefix`.
+        """
+        with self._lock:
+            for partition in list(self._matrices):
+                if not partition.startswith(prefix):
+                    del self._matrices[partition]
+                    self._versions.pop(partition, None)
+                    self._resynced_at.pop(partition, None)
+                    self._tasks.pop(partition, None)
+
+    def _store_call(self, partition: str, key: str, embedding, fields: Dict) -> Dict:
+        args = [self.ttl, time.time(), self.policy, self.max_entries(partition)]
+        for field, value in fields.items():
+            args.extend([field, value])
+        args.extend([VECTOR_FIELD, np.asarray(embedding, dtype="<f4").tobytes()])
+
+        return {
+            "keys": [
+                key,
+                self._version_key(partition),
+                self._members_key(partition),
+                self._usage_key(partition),
+                self._stats_key(partition)
+            ],
+            "args": args
+        }
+
+    def _apply_own(self, partition: str, key: str, embedding, version: int):
+        with self._lock:
+            # Apply our own write without a round trip only when no other
+            # worker has written in between; otherwise the next lookup syncs.
+            if version == self._versions.get(partition, 0) + 1:
+                matrix = self._matrices.setdefault(partition, EmbeddingMatrix())
+                matrix.upsert(key, embedding)
+                self._versions[partition] = version
+
+    async def astore(self, partition: str, key: str, embedding, fields: Dict) -> int:
+        """
+        Writes an entry, publishes it to all workers and applies it locally.
+        Returns the number of entries evicted to stay within quota.
+        """
+        if async_redis_client is None:
+            return 0
+
+        version, evicted = await self._astore(
+            **self._store_call(partition, key, embedding, fields)
+        )
+        self._apply_own(partition, key, embedding, int(version))
+        return int(evicted)
+
+    def stats(self, partition: str) -> Dict:
+        if redis_client is None:
+            return {}
+
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hgetall(self._stats_key(partition))
+        pipe.zcard(self._usage_key(partition))
+        counters, resident = pipe.execute()
+
+        hits = int(counters.get("hits", 0))
+        misses = int(counters.get("misses", 0))
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "evictions": int(counters.get("evictions", 0)),
+            "resident_entries": resident,
+            "max_entries": self.max_entries(partition),
+            "policy": self.policy
+        }
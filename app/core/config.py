@@ -31,3 +31,218 @@ PINECONE_SCORE_THRESHOLD = float(
 RERANK_SCORE_THRESHOLD = float(
     os.getenv("RERANK_SCORE_THRESHOLD", "0.5")
 )
+
+EXACT_CACHE_TTL = int(
+    os.getenv("EXACT_CACHE_TTL", str(SEMANTIC_CACHE_TTL))
+)
+EXACT_CACHE_LOCAL_SIZE = int(
+    os.getenv("EXACT_CACHE_LOCAL_SIZE", "1024")
+)
+EXACT_CACHE_LOCAL_TTL = int(
+    os.getenv("EXACT_CACHE_LOCAL_TTL", "60")
+)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_CACHE_LOCAL_SIZE = int(
+    os.getenv("EMBEDDING_CACHE_LOCAL_SIZE", "4096")
+)
+EMBEDDING_CACHE_TTL = int(
+    os.getenv("EMBEDDING_CACHE_TTL", str(7 * 24 * 3600))
+)
+
+# Roles allowed on /admin routes and the X-Profile header. Empty by
+# default so admin access fails closed; business roles (employee,
+# manager, hr) should not be listed here.
+ADMIN_ROLES = [
+    r.strip() for r in os.getenv("ADMIN_ROLES", "").split(",") if r.strip()
+]
+
+RETRIEVAL_CACHE_TTL = int(
+    os.getenv("RETRIEVAL_CACHE_TTL", str(SEMANTIC_CACHE_TTL))
+)
+# Rankings from the fallback reranker are cached only this long, so a
+# transient Cohere failure does not pin them for RETRIEVAL_CACHE_TTL
+RETRIEVAL_CACHE_DEGRADED_TTL = int(
+    os.getenv("RETRIEVAL_CACHE_DEGRADED_TTL", "60")
+)
+INDEX_VERSION_REFRESH_SECONDS = float(
+    os.getenv("INDEX_VERSION_REFRESH_SECONDS", "5")
+)
+
+RBAC_ROLES = [
+    r.strip()
+    for r in os.getenv("RBAC_ROLES", "employee,manager,hr").split(",")
+    if r.strip()
+]
+
+HOT_QUESTIONS_MAX = int(os.getenv("HOT_QUESTIONS_MAX", "1000"))
+HOT_QUESTIONS_FLUSH_SECONDS = float(
+    os.getenv("HOT_QUESTIONS_FLUSH_SECONDS", "10")
+)
+
+# Per-role entry quotas, e.g. "employee=5000,manager=2000,hr=2000";
+# roles not listed use SEMANTIC_CACHE_MAX_ENTRIES (0 = unbounded)
+SEMANTIC_CACHE_MAX_ENTRIES = int(
+    os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000")
+)
+SEMANTIC_CACHE_ROLE_QUOTAS = {
+    role.strip(): int(limit)
+    for role, _, limit in (
+        item.partition("=")
+        for item in os.getenv("SEMANTIC_CACHE_ROLE_QUOTAS", "").split(",")
+        if "=" in item
+    )
+}
+SEMANTIC_CACHE_EVICTION = os.getenv("SEMANTIC_CACHE_EVICTION", "lfu").lower()
+SEMANTIC_INDEX_RESYNC_SECONDS = float(
+    os.getenv("SEMANTIC_INDEX_RESYNC_SECONDS", "300")
+)
+
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", "300"))
+NEGATIVE_CACHE_THRESHOLD = float(
+    os.getenv("NEGATIVE_CACHE_THRESHOLD", "0.9")
+)
+NEGATIVE_CACHE_MAX_ENTRIES = int(
+    os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "2000")
+)
+
+# Overlap independent pipeline stages (BM25 with the embedding call,
+# memory loading with rerank). SPECULATIVE_RETRIEVAL additionally sends
+# the Pinecone query alongside the cache lookups; it is wasted on a hit.
+CONCURRENT_STAGES = os.getenv("CONCURRENT_STAGES", "true").lower() == "true"
+SPECULATIVE_RETRIEVAL = (
+    os.getenv("SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+)
+
+# Post-answer cache writes, memory flush and summarization go through a
+# Redis stream consumed by a worker task in every API process.
+BACKGROUND_BOOKKEEPING = (
+    os.getenv("BACKGROUND_BOOKKEEPING", "true").lower() == "true"
+)
+# Backlog limit: processed entries are deleted, so everything in the
+# stream is still owed work. Past this length jobs run inline instead of
+# trimming (which would silently drop them).
+BOOKKEEPING_STREAM_MAXLEN = int(
+    os.getenv("BOOKKEEPING_STREAM_MAXLEN", "10000")
+)
+BOOKKEEPING_BATCH_SIZE = int(os.getenv("BOOKKEEPING_BATCH_SIZE", "32"))
+BOOKKEEPING_CLAIM_IDLE_MS = int(
+    os.getenv("BOOKKEEPING_CLAIM_IDLE_MS", "30000")
+)
+BOOKKEEPING_MAX_ATTEMPTS = int(os.getenv("BOOKKEEPING_MAX_ATTEMPTS", "5"))
+
+ASK_BATCH_MAX_QUESTIONS = int(os.getenv("ASK_BATCH_MAX_QUESTIONS", "100"))
+# Questions of one batch retrieving / generating at the same time
+ASK_BATCH_CONCURRENCY = int(os.getenv("ASK_BATCH_CONCURRENCY", "8"))
+
+# Cross-request embedding micro-batching; a window of 0 sends every
+# question on its own
+EMBEDDING_BATCH_WINDOW_MS = float(
+    os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5")
+)
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
+
+# Concurrent requests for the same (role, normalized question) wait for
+# one pipeline run, across workers via a Redis lock. A similarity above 0
+# also joins in-flight near-duplicates within a worker.
+SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "true").lower() == "true"
+SINGLE_FLIGHT_TIMEOUT_SECONDS = float(
+    os.getenv("SINGLE_FLIGHT_TIMEOUT_SECONDS", "15")
+)
+SINGLE_FLIGHT_SIMILARITY = float(os.getenv("SINGLE_FLIGHT_SIMILARITY", "0"))
+
+# Context sent to the LLM: children are collapsed by parent, then cut to
+# this many tokens (0 = no limit). A parent that would be cut below
+# CONTEXT_MIN_BLOCK_TOKENS is dropped instead.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+CONTEXT_MIN_BLOCK_TOKENS = int(os.getenv("CONTEXT_MIN_BLOCK_TOKENS", "100"))
+
+# Query-focused extractive compression of each parent before generation,
+# enabled per route, e.g. "ask_with_metrics,ask_stream". Sentences are
+# scored with the BM25 encoder; the best ones plus COMPRESSION_NEIGHBOURS
+# either side are kept until COMPRESSION_RATIO of the text remains.
+CONTEXT_COMPRESSION_ROUTES = {
+    r.strip()
+    for r in os.getenv("CONTEXT_COMPRESSION_ROUTES", "").split(",")
+    if r.strip()
+}
+COMPRESSION_RATIO = float(os.getenv("COMPRESSION_RATIO", "0.4"))
+COMPRESSION_NEIGHBOURS = int(os.getenv("COMPRESSION_NEIGHBOURS", "1"))
+
+# Adaptive rerank: skip Cohere when the hybrid scores already show a
+# clear winner (top score >= RERANK_SKIP_MIN_SCORE, ahead of the next by
+# RERANK_SKIP_MARGIN, normalized score entropy <= RERANK_SKIP_MAX_ENTROPY).
+# Otherwise, with a window above 0, only candidates within
+# RERANK_CANDIDATE_WINDOW of the top score are reranked.
+ADAPTIVE_RERANK = os.getenv("ADAPTIVE_RERANK", "false").lower() == "true"
+RERANK_SKIP_MARGIN = float(os.getenv("RERANK_SKIP_MARGIN", "0.15"))
+RERANK_SKIP_MIN_SCORE = float(os.getenv("RERANK_SKIP_MIN_SCORE", "0.7"))
+RERANK_SKIP_MAX_ENTROPY = float(os.getenv("RERANK_SKIP_MAX_ENTROPY", "1.0"))
+RERANK_CANDIDATE_WINDOW = float(os.getenv("RERANK_CANDIDATE_WINDOW", "0"))
+
+# Reranker backend: "cohere" or "local" (in-process BM25, no network).
+# RERANKER_BY_ROLE overrides it per role, e.g. "employee=local". A failed
+# or timed-out backend is replaced by RERANKER_FALLBACK.
+RERANKER = os.getenv("RERANKER", "cohere")
+RERANKER_BY_ROLE = {
+    role.strip(): backend.strip()
+    for role, _, backend in (
+        item.partition("=")
+        for item in os.getenv("RERANKER_BY_ROLE", "").split(",")
+        if "=" in item
+    )
+}
+RERANKER_FALLBACK = os.getenv("RERANKER_FALLBACK", "local")
+RERANKER_TIMEOUT_SECONDS = float(os.getenv("RERANKER_TIMEOUT_SECONDS", "2"))
+LOCAL_RERANK_MIN_SCORE = float(os.getenv("LOCAL_RERANK_MIN_SCORE", "0"))
+LOCAL_RERANK_PARENT_WEIGHT = float(
+    os.getenv("LOCAL_RERANK_PARENT_WEIGHT", "0.5")
+)
+
+# Request deadline, split into per-dependency caps. A call still running
+# past its dependency's recent P95 is duplicated (embedding and Pinecone
+# only). A dependency failing BREAKER_FAILURE_THRESHOLD times in a row is
+# not called for BREAKER_RESET_SECONDS.
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "10"))
+EMBEDDING_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_TIMEOUT_SECONDS", "2"))
+PINECONE_TIMEOUT_SECONDS = float(os.getenv("PINECONE_TIMEOUT_SECONDS", "2"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "8"))
+# Time the rerank leaves for the LLM: its recent P95 once known, this
+# until then
+LLM_RESERVE_SECONDS = float(os.getenv("LLM_RESERVE_SECONDS", "3"))
+HEDGED_REQUESTS = os.getenv("HEDGED_REQUESTS", "true").lower() == "true"
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+# Every request's stage breakdown is kept in an in-memory ring buffer;
+# requests slower than FLIGHT_RECORDER_SLOW_MS also go to a Redis stream
+FLIGHT_RECORDER_SIZE = int(os.getenv("FLIGHT_RECORDER_SIZE", "2000"))
+FLIGHT_RECORDER_SLOW_MS = float(os.getenv("FLIGHT_RECORDER_SLOW_MS", "3000"))
+FLIGHT_RECORDER_STREAM_MAXLEN = int(
+    os.getenv("FLIGHT_RECORDER_STREAM_MAXLEN", "5000")
+)
+
+# Prometheus /metrics endpoint and Server-Timing response headers
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# On-demand profiling (off by default; the middleware is not installed
+# at all unless enabled). A request is profiled when it carries an
+# X-Profile header holding an admin's token, or at PROFILE_SAMPLE_RATE.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# collapsed | speedscope
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "collapsed")
+
+# Pooled HTTP clients shared by the OpenAI, ChatOpenAI, Cohere and Groq
+# SDKs (one pool per dependency). HTTP/2 needs the `h2` package.
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "120"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+# Connections opened to each dependency at startup before /ready passes
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "2"))
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "10"))
@@ -0,0 +1,151 @@
+import json
+import time
+import asyncio
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.cache.redis_client import async_redis_client
+from app.core.config import (
+    FLIGHT_RECORDER_SIZE,
+    FLIGHT_RECORDER_SLOW_MS,
+    FLIGHT_RECORDER_STREAM_MAXLEN
+)
+
+SLOW_STREAM = "rag:slow_requests"
+
+# Longest question text kept per entry
+QUESTION_CHARS = 200
+
+_buffer = deque(maxlen=FLIGHT_RECORDER_SIZE)
+
+# Keeps the fire-and-forget stream writes alive until they finish
+_pending = set()
+
+
+def _entry(state: dict, error: Optional[str]) -> Dict:
+    usage, cache = state["usage"], state["cache"]
+    return {
+        "ts": round(time.time(), 3),
+        "role": state["role"],
+        "session_id": state["session_id"],
+        "question": state["question"][:QUESTION_CHARS],
+        "total_ms": round((time.perf_counter() - state["t0"]) * 1000, 1),
+        "stages": {
+            stage: round(seconds * 1000, 1)
+            for stage, seconds in state["latency"].items()
+        },
+        "cache_hits": [tier for tier, hit in cache.items() if hit],
+        "matches": state.get("matches"),
+        "rerank_scores": state.get("rerank_scores"),
+        "reranker_backend": usage.get("reranker_backend"),
+        "context_tokens": usage.get("context_tokens"),
+        "llm_input_tokens": usage.get("llm_input_tokens"),
+        "llm_output_tokens": usage.get("llm_output_tokens"),
+        "streamed": bool(state.get("streamed")),
+        "error": error
+    }
+
+
+async def _publish(entry: Dict):
+    try:
+        await async_redis_client.xadd(
+            SLOW_STREAM,
+            {"entry": json.dumps(entry)},
+            maxlen=FLIGHT_RECORDER_STREAM_MAXLEN,
+            approximate=True
+        )
+    except Exception as e:
+        print("Slow request publish failed:", e)
+
+
+def record_flight(state: dict, error: Optional[str] = None):
+    """
+    Records a finished (or failed) request. Building the entry is a few
+    dict comprehensions; the Redis write for slow requests runs as a
+    background task, so the request never waits on it.
+    """
+    if state.get("recorded"):
+        return
+    state["recorded"] = True
+
+    entry = _entry(state, error)
+    _buffer.append(entry)
+
+    if entry["total_ms"] < FLIGHT_RECORDER_SLOW_MS or async_redis_client is None:
+        return
+    try:
+        task = asyncio.get_running_loop().create_task(_publish(entry))
+    except RuntimeError:
+        return
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+def _matches(
+    entry: Dict,
+    role: Optional[str],
+    stage: Optional[str],
+    min_ms: float,
+    since: Optional[float],
+    until: Optional[float]
+) -> bool:
+    if role is not None and entry["role"] != role:
+        return False
+    if since is not None and entry["ts"] < since:
+        return False
+    if until is not None and entry["ts"] > until:
+        return False
+    if stage is not None:
+        return entry["stages"].get(stage, 0.0) >= min_ms
+    return entry["total_ms"] >= min_ms
+
+
+async def slow_requests(
+    role: Optional[str] = None,
+    stage: Optional[str] = None,
+    min_ms: float = FLIGHT_RECORDER_SLOW_MS,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 50,
+    source: str = "memory"
+) -> List[Dict]:
+    """
+    Newest first. `min_ms` applies to `stage` when given, else to the
+    whole request. `since` / `until` are unix timestamps. The "memory"
+    source is this worker's ring buffer (every request); "redis" is the
+    stream shared by all workers (slow requests only).
+    """
+    if source == "redis":
+        if async_redis_client is None:
+            return []
+        entries = []
+        # Stream IDs start with the entry's time in ms
+        start = str(int(since * 1000)) if since is not None else "-"
+        end = str(int(until * 1000)) if until is not None else "+"
+        # The stream is capped, so a full scan stays bounded
+        for _, fields in await async_redis_client.xrevrange(SLOW_STREAM, max=end, min=start):
+            entries.append(json.loads(fields["entry"]))
+    else:
+        entries = list(reversed(_buffer))
+
+    found = []
+    for entry in entries:
+        if _matches(entry, role, stage, min_ms, since, until):
+            found.append(entry)
+            if len(found) >= limit:
+                break
+    return found
+
+
+def flight_recorder_stats() -> Dict:
+    if not _buffer:
+        return {"recorded": 0}
+
+    totals = sorted(e["total_ms"] for e in _buffer)
+    return {
+        "recorded": len(totals),
+        "slow": sum(1 for t in totals if t >= FLIGHT_RECORDER_SLOW_MS),
+        "p50_ms": totals[len(totals) // 2],
+        "p95_ms": totals[min(len(totals) - 1, int(len(totals) * 0.95))],
+        "max_ms": totals[-1]
+    }
@@ -0,0 +1,61 @@
+from typing import Dict
+
+import httpx
+
+from app.core.config import (
+    HTTP_POOL_MAX_CONNECTIONS,
+    HTTP_POOL_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_SECONDS,
+    HTTP2_ENABLED
+)
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = HTTP2_ENABLED
+except ImportError:
+    HTTP2 = False
+    if HTTP2_ENABLED:
+        print("⚠️ h2 not installed, pooled HTTP clients use HTTP/1.1")
+
+# The SDKs pass their own per-request timeouts; this only bounds a
+# request that reaches the client without one
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# One pool per dependency, so a slow one cannot take every connection
+_sync_clients: Dict[str, httpx.Client] = {}
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+    )
+
+
+def sync_http_client(name: str) -> httpx.Client:
+    client = _sync_clients.get(name)
+    if client is None:
+        client = _sync_clients[name] = httpx.Client(
+            http2=HTTP2, limits=_limits(), timeout=DEFAULT_TIMEOUT
+        )
+    return client
+
+
+def async_http_client(name: str) -> httpx.AsyncClient:
+    client = _async_clients.get(name)
+    if client is None:
+        client = _async_clients[name] = httpx.AsyncClient(
+            http2=HTTP2, limits=_limits(), timeout=DEFAULT_TIMEOUT
+        )
+    return client
+
+
+async def aclose_http_clients():
+    for client in _async_clients.values():
+        await client.aclose()
+    for client in _sync_clients.values():
+        client.close()
+    _async_clients.clear()
+    _sync_clients.clear()
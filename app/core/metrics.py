@@ -0,0 +1,225 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from app.cache.redis_client import (
+    redis_client,
+    redis_binary_client,
+    async_redis_client,
+    async_redis_binary_client
+)
+from app.core.resilience import breakers, trackers
+
+# Prometheus text exposition, kept in-process: recording is a dict lookup
+# and a few integer additions, so it stays on in production. Each worker
+# process exposes its own series.
+
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUEST_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Latency of the request being served; filled in by the pipeline and
+# read back for its Server-Timing header
+_timings: ContextVar[Optional[dict]] = ContextVar("request_timings", default=None)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{v}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help_text, labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+
+    def set(self, *labels: str, value: float):
+        self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name, self.help, self.label_names = name, help_text, labels
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                label_str = _labels(self.label_names + ("le",), labels + (le,))
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            base = _labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{base} {series[-1]}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+request_seconds = Histogram(
+    "rag_request_seconds", "HTTP request duration", ("route", "status"), REQUEST_BUCKETS
+)
+stage_seconds = Histogram(
+    "rag_stage_seconds", "Time a request waited on each pipeline stage", ("stage",), STAGE_BUCKETS
+)
+cache_lookups = Counter(
+    "rag_cache_lookups_total", "Cache lookups per tier and role", ("tier", "role", "result")
+)
+tokens = Counter("rag_tokens_total", "Tokens used", ("kind",))
+reranker_calls = Counter(
+    "rag_reranker_calls_total", "Rerank calls attempted per backend (Cohere calls are billable)", ("backend",)
+)
+in_flight = Gauge("rag_requests_in_flight", "Requests being served")
+redis_pool = Gauge(
+    "rag_redis_pool_connections", "Redis pool connections", ("client", "state")
+)
+breaker_open = Gauge(
+    "rag_circuit_open", "1 while the dependency's circuit breaker is open", ("dependency",)
+)
+breaker_trips = Gauge("rag_circuit_trips", "Times the circuit breaker opened", ("dependency",))
+hedges = Gauge("rag_hedged_requests", "Hedged calls sent and won", ("dependency", "result"))
+
+in_flight.set(value=0)
+
+REGISTRY = [
+    request_seconds, stage_seconds, cache_lookups, tokens, reranker_calls,
+    in_flight, redis_pool, breaker_open, breaker_trips, hedges
+]
+
+
+def record_cache(tier: str, role: str, hit: bool):
+    cache_lookups.inc(tier, role, "hit" if hit else "miss")
+
+
+def record_request(latency: Dict[str, float], usage: Dict):
+    """
+    Stage histograms and usage counters for a finished pipeline run; the
+    latency dict is also handed to the Server-Timing header.
+    """
+    holder = _timings.get()
+    if holder is not None:
+        holder["latency"] = latency
+
+    for stage, seconds in latency.items():
+        stage_seconds.observe(seconds, stage)
+
+    for kind in ("embedding", "llm_input", "llm_output"):
+        if usage.get(f"{kind}_tokens"):
+            tokens.inc(kind, amount=usage[f"{kind}_tokens"])
+
+    # Every call made, per backend: a Cohere timeout that fell back to
+    # local counts once under each, a skipped rerank under neither
+    for backend, calls in (usage.get("reranker_attempts") or {}).items():
+        reranker_calls.inc(backend, amount=calls)
+
+
+def _pool_usage():
+    clients = {
+        "sync": redis_client,
+        "sync_binary": redis_binary_client,
+        "async": async_redis_client,
+        "async_binary": async_redis_binary_client
+    }
+    for name, client in clients.items():
+        if client is None:
+            continue
+        pool = client.connection_pool
+        redis_pool.set(name, "in_use", value=len(getattr(pool, "_in_use_connections", ())))
+        redis_pool.set(name, "available", value=len(getattr(pool, "_available_connections", ())))
+
+
+def render_metrics() -> str:
+    _pool_usage()
+    for name, breaker in breakers.items():
+        breaker_open.set(name, value=1 if breaker.state == "open" else 0)
+        breaker_trips.set(name, value=breaker.trips)
+    for name, tracker in trackers.items():
+        hedges.set(name, "sent", value=tracker.hedges_sent)
+        hedges.set(name, "won", value=tracker.hedges_won)
+
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(latency: Dict[str, float], total: float) -> str:
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in latency.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: request histogram, in-flight gauge and the
+    Server-Timing header (stages known when the response starts; for a
+    stream that is everything before the LLM).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t_start = time.perf_counter()
+        holder: dict = {}
+        token = _timings.set(holder)
+        status = {"code": 500}
+        in_flight.inc(amount=1)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                header = server_timing(
+                    holder.get("latency", {}), time.perf_counter() - t_start
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            in_flight.inc(amount=-1)
+            _timings.reset(token)
+            route = scope.get("route")
+            request_seconds.observe(
+                time.perf_counter() - t_start,
+                getattr(route, "path", "unmatched"),
+                str(status["code"])
+            )
@@ -0,0 +1,23 @@
+from typing import Dict
+
+PRICING = {
+    "embedding_per_1k": 0.00002,
+    "llm_input_per_1k": 0.0005,
+    "llm_output_per_1k": 0.0015,
+    "reranker_per_call": 0.001
+}
+
+
+def compute_cost(usage: Dict) -> Dict:
+    embed = usage["embedding_tokens"] / 1000 * PRICING["embedding_per_1k"]
+    llm_in = usage["llm_input_tokens"] / 1000 * PRICING["llm_input_per_1k"]
+    llm_out = usage["llm_output_tokens"] / 1000 * PRICING["llm_output_per_1k"]
+    rerank = usage["reranker_calls"] * PRICING["reranker_per_call"]
+
+    return {
+        "total": embed + llm_in + llm_out + rerank,
+        "embedding": embed,
+        "llm_input": llm_in,
+        "llm_output": llm_out,
+        "reranker": rerank
+    }
@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.security import get_current_user, require_admin
+from app.core.config import (
+    PROFILE_SAMPLE_RATE,
+    PROFILE_INTERVAL_MS,
+    PROFILE_DIR,
+    PROFILE_FORMAT
+)
+
+PROFILE_HEADER = b"x-profile"
+
+# Code object -> frame label, so a sample costs a dict lookup per frame
+_labels: Dict = {}
+
+# One profile per worker at a time; the sampler sees the whole event loop
+_active = {"sampler": None}
+
+# Where idle pool threads block: (function, file name) of the top frame.
+# Threadpool (sync dependencies such as JWT decode) and to_thread workers
+# are only sampled while they run something.
+_IDLE_FRAMES = {
+    ("wait", "threading.py"),
+    ("get", "queue.py"),
+    ("_worker", "thread.py")
+}
+
+LOOP_ROOT = "[event loop]"
+WORKER_ROOT = "[worker thread]"
+
+
+def _short_path(path: str) -> str:
+    marker = "site-packages" + os.sep
+    if marker in path:
+        return path.split(marker, 1)[1]
+    cwd = os.getcwd() + os.sep
+    return path[len(cwd):] if path.startswith(cwd) else path
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        name = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        label = _labels[code] = name.replace(";", ":")
+    return label
+
+
+def _idle(frame) -> bool:
+    code = frame.f_code
+    return (code.co_name, os.path.basename(code.co_filename)) in _IDLE_FRAMES
+
+
+class StackSampler:
+    """
+    Samples the event-loop thread (`thread_id`) and every busy worker
+    thread every `interval` seconds from a background thread, and counts
+    identical stacks under an "[event loop]" or "[worker thread]" root.
+    A sampling profiler: the profiled code runs unmodified, and idle time
+    shows up as the loop waiting in select.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id == self.thread_id:
+                    root = LOOP_ROOT
+                elif _idle(frame):
+                    continue
+                else:
+                    root = WORKER_ROOT
+
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(root)
+                self.counts[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+
+def to_collapsed(counts: Counter) -> str:
+    # Brendan Gregg's folded format, read by flamegraph.pl and speedscope
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+def to_speedscope(counts: Counter, name: str, interval_ms: float) -> Dict:
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, n in counts.items():
+        sample = []
+        for label in stack.split(";"):
+            if label not in index:
+                index[label] = len(frames)
+                frames.append({"name": label})
+            sample.append(index[label])
+        samples.append(sample)
+        weights.append(n * interval_ms)
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights
+        }]
+    }
+
+
+def write_profile(counts: Counter, name: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if PROFILE_FORMAT == "speedscope":
+        path = os.path.join(PROFILE_DIR, f"{name}.speedscope.json")
+        with open(path, "w") as f:
+            json.dump(to_speedscope(counts, name, PROFILE_INTERVAL_MS), f)
+    else:
+        path = os.path.join(PROFILE_DIR, f"{name}.collapsed")
+        with open(path, "w") as f:
+            f.write(to_collapsed(counts))
+    return path
+
+
+def _is_admin_token(token: str) -> bool:
+    # Same checks as the admin routes: valid token, active user, admin role
+    if token.lower().startswith("bearer "):
+        token = token[7:]
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    try:
+        require_admin(get_current_user(credentials))
+    except HTTPException:
+        return False
+    return True
+
+
+def _wants_profile(scope) -> bool:
+    for key, value in scope.get("headers", ()):
+        if key == PROFILE_HEADER:
+            return _is_admin_token(value.decode())
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles selected requests and writes one file
+    per request to PROFILE_DIR; the response names it in an X-Profile
+    header. Only installed when PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or _active["sampler"] is not None
+            or not _wants_profile(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        route = scope["path"].strip("/").replace("/", "_") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{route}-{uuid.uuid4().hex[:8]}"
+
+        sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+        _active["sampler"] = sampler
+        sampler.start()
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_HEADER, name.encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            counts = sampler.stop()
+            _active["sampler"] = None
+            try:
+                path = await asyncio.to_thread(write_profile, counts, name)
+                print(f"🔬 Profile written: {path} ({sum(counts.values())} samples)")
+            except Exception as e:
+                print("Profile write failed:", e)
@@ -0,0 +1,219 @@
+import time
+import asyncio
+from collections import deque
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Optional
+
+import numpy as np
+
+from app.core.config import (
+    HEDGED_REQUESTS,
+    HEDGE_MIN_SAMPLES,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_SECONDS
+)
+
+# Recent successful call durations per dependency, for the hedge delay
+LATENCY_WINDOW = 200
+
+# Usage dict of the request being served; hedges are counted into it
+_usage: ContextVar[Optional[dict]] = ContextVar("resilience_usage", default=None)
+
+
+class DependencyUnavailable(Exception):
+    """
+    Raised instead of calling a dependency whose circuit breaker is open.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(f"{name} circuit open")
+        self.name = name
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for
+    `reset_seconds`. Then a single trial call is let through (half-open):
+    success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, name: str, threshold: int, reset_seconds: float):
+        self.name = name
+        self.threshold = max(1, threshold)
+        self.reset_seconds = reset_seconds
+
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+
+        if self.state == "half_open":
+            if self._probing:
+                self.rejected += 1
+                return False
+            self._probing = True
+
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            if self.state != "open":
+                self.trips += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        # The call was abandoned by its caller; it proved nothing either way
+        self._probing = False
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected
+        }
+
+
+class LatencyTracker:
+
+    def __init__(self):
+        self._durations = deque(maxlen=LATENCY_WINDOW)
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def add(self, seconds: float):
+        self._durations.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        if len(self._durations) < HEDGE_MIN_SAMPLES:
+            return None
+        return float(np.percentile(self._durations, 95))
+
+    def stats(self) -> Dict:
+        p95 = self.p95()
+        return {
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won
+        }
+
+
+DEPENDENCIES = ("embedding", "pinecone", "reranker", "llm")
+
+breakers: Dict[str, CircuitBreaker] = {
+    name: CircuitBreaker(name, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+    for name in DEPENDENCIES
+}
+trackers: Dict[str, LatencyTracker] = {name: LatencyTracker() for name in DEPENDENCIES}
+
+
+def bind_usage(usage: dict):
+    """
+    Hedges sent on behalf of the current request are counted into
+    usage["hedged_requests"].
+    """
+    _usage.set(usage)
+
+
+def _count_hedge():
+    usage = _usage.get()
+    if usage is not None:
+        usage["hedged_requests"] = usage.get("hedged_requests", 0) + 1
+
+
+async def _hedged(name: str, factory: Callable[[], Awaitable]):
+    """
+    Starts a second, identical call once the first has run past the
+    dependency's recent P95, and returns whichever succeeds first.
+    """
+    tracker = trackers[name]
+    delay = tracker.p95()
+    if delay is None:
+        return await factory()
+
+    # Anything still running when we leave (including on cancellation by
+    # the caller's deadline) is cancelled
+    first = asyncio.ensure_future(factory())
+    pending = {first}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return first.result()
+
+        tracker.hedges_sent += 1
+        _count_hedge()
+        second = asyncio.ensure_future(factory())
+        pending = {first, second}
+
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        tracker.hedges_won += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def guarded_call(
+    name: str,
+    factory: Callable[[], Awaitable],
+    timeout: float,
+    hedge: bool = False
+):
+    """
+    Calls a dependency through its circuit breaker with a `timeout`
+    (which counts as a failure). `hedge` is only for idempotent calls.
+    """
+    breaker = breakers[name]
+    if not breaker.allow():
+        raise DependencyUnavailable(name)
+
+    t_start = time.perf_counter()
+    try:
+        if hedge and HEDGED_REQUESTS:
+            result = await asyncio.wait_for(_hedged(name, factory), timeout)
+        else:
+            result = await asyncio.wait_for(factory(), timeout)
+
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+
+    except Exception:
+        breaker.record_failure()
+        raise
+
+    breaker.record_success()
+    trackers[name].add(time.perf_counter() - t_start)
+    return result
+
+
+def resilience_stats() -> Dict:
+    return {
+        "breakers": {name: b.stats() for name, b in breakers.items()},
+        "latency": {name: t.stats() for name, t in trackers.items()}
+    }
@@ -6,7 +6,12 @@ from jose import jwt, JWTError
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.config import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    ADMIN_ROLES
+)
 from app.auth.users import users_db
 
 pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
@@ -47,3 +52,8 @@ def get_current_user(
 
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+
+def require_admin(current_user=Depends(get_current_user)) -> Dict[str, Any]:
+    if current_user["role"] not in ADMIN_ROLES:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
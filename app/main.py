@@ -1,16 +1,77 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.auth.routes import router as auth_router
-from app.rag.routes import router as rag_router
+from app.rag.routes import router as rag_router, llm
+from app.rag.bookkeeping import (
+    start_bookkeeping_worker,
+    stop_bookkeeping_worker
+)
+from app.admin.routes import router as admin_router
+from app.cache.index_version import (
+    start_index_version_refresher,
+    stop_index_version_refresher
+)
+from app.rag.readiness import warm_connections, readiness
+from app.core.http_clients import aclose_http_clients
+from app.rag.embeddings import embedding_batcher
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.config import METRICS_ENABLED, PROFILING_ENABLED
 
 
 app = FastAPI(title="Multi-RAG HR Assistant (Secure)")
 
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+
+_warmup_task = {"task": None}
+
+
+@app.on_event("startup")
+async def startup():
+    await start_index_version_refresher()
+    start_bookkeeping_worker(llm)
+    # In the background, so liveness (/) answers while /ready waits
+    _warmup_task["task"] = asyncio.create_task(warm_connections())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_index_version_refresher()
+    await stop_bookkeeping_worker()
+    if embedding_batcher is not None:
+        await embedding_batcher.drain()
+    await aclose_http_clients()
+
+
 @app.get("/")
 def root():
     return {"status": "Multi-RAG HR Assistant (FastAPI) - secure"}
 
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    status = readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    if not METRICS_ENABLED:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4"
+    )
+
+
 app.include_router(auth_router)
 app.include_router(rag_router)
+app.include_router(admin_router)
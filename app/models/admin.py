@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+
+class WarmupQuestion(BaseModel):
+    role: str
+    question: str
+
+
+class WarmupRequest(BaseModel):
+    source: Literal["eval", "traffic", "questions"] = "traffic"
+    questions: List[WarmupQuestion] = []
+    roles: Optional[List[str]] = None
+    top_n: int = 50
+    concurrency: int = 4
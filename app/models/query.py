@@ -1,4 +1,9 @@
+from typing import List
 from pydantic import BaseModel
 
 class Query(BaseModel):
     question: str
+
+
+class BatchQuery(BaseModel):
+    questions: List[str]
@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import socket
+import asyncio
+import redis
+from typing import Dict, List, Tuple
+
+from app.cache.redis_client import async_redis_client
+from app.cache.exact_cache import astore_exact_cache
+from app.cache.semantic_cache import astore_semantic_cache
+from app.cache.memory import astage_turn, aflush_turns, amaybe_summarize
+from app.cache.index_version import use_index_version
+from app.core.config import (
+    BACKGROUND_BOOKKEEPING,
+    BOOKKEEPING_STREAM_MAXLEN,
+    BOOKKEEPING_BATCH_SIZE,
+    BOOKKEEPING_CLAIM_IDLE_MS,
+    BOOKKEEPING_MAX_ATTEMPTS
+)
+
+BOOKKEEPING_STREAM = "rag:bookkeeping"
+BOOKKEEPING_GROUP = "bookkeepers"
+CONSUMER_NAME = f"{socket.gethostname()}:{os.getpid()}"
+
+SUMMARY_LOCK_TTL = 120
+READ_BLOCK_MS = 1000
+
+# Appends a job unless the backlog is full. Nothing is trimmed: every
+# entry in the stream is still pending or undelivered.
+#
+# KEYS: stream
+# ARGV: max length, job
+_ENQUEUE_SCRIPT = """
+if redis.call('XLEN', KEYS[1]) >= tonumber(ARGV[1]) then
+    return false
+end
+return redis.call('XADD', KEYS[1], '*', 'job', ARGV[2])
+"""
+
+_aenqueue = None
+if async_redis_client is not None:
+    _aenqueue = async_redis_client.register_script(_ENQUEUE_SCRIPT)
+
+_worker = {"task": None}
+
+
+def _summary_lock_key(session_id: str) -> str:
+    return f"chat:{session_id}:summarizing"
+
+
+async def _summarize(session_id: str, llm):
+    # One summarization per session at a time across all workers; a
+    # skipped run is picked up by the next turn's job.
+    lock = _summary_lock_key(session_id)
+    if not await async_redis_client.set(lock, CONSUMER_NAME, nx=True, ex=SUMMARY_LOCK_TTL):
+        return
+
+    try:
+        await amaybe_summarize(session_id, llm)
+    finally:
+        await async_redis_client.delete(lock)
+
+
+async def run_bookkeeping(job: Dict, llm):
+    """
+    Writes the answer to the exact and semantic caches, flushes staged
+    turns and summarizes if due. Safe to run more than once per job.
+    """
+    answer = {"answer": job["answer"], "access": job["access"]}
+
+    # Coalesced answers were cached by the request that produced them
+    if job.get("store", True):
+        with use_index_version(job["version"]):
+            await astore_semantic_cache(
+                access=job["access"],
+                question=job["question"],
+                embedding=job["embedding"],
+                answer=answer
+            )
+            await astore_exact_cache(job["access"], job["question"], answer)
+
+    if job["use_memory"] and async_redis_client is not None:
+        await aflush_turns(job["session_id"])
+        await _summarize(job["session_id"], llm)
+
+
+async def submit_bookkeeping(job: Dict, llm, defer: bool = True):
+    """
+    Stages the turn so the session's next request sees it, then queues
+    the job for the worker. Runs it inline when deferral is off or the
+    stream cannot be reached.
+    """
+    if job["use_memory"]:
+        await astage_turn(
+            job["session_id"],
+            {
+                "user": job["question"],
+                "assistant": job["answer"],
+                "ts": job["ts"]
+            }
+        )
+
+    if defer and BACKGROUND_BOOKKEEPING and async_redis_client is not None:
+        try:
+            entry_id = await _aenqueue(
+                keys=[BOOKKEEPING_STREAM],
+                args=[BOOKKEEPING_STREAM_MAXLEN, json.dumps(job)]
+            )
+            if entry_id:
+                return
+            print("Bookkeeping backlog full, running job inline")
+
+        except Exception as e:
+            print("Bookkeeping enqueue failed:", e)
+
+    await run_bookkeeping(job, llm)
+
+
+async def _ack(entry_id: str):
+    pipe = async_redis_client.pipeline(transaction=False)
+    pipe.xack(BOOKKEEPING_STREAM, BOOKKEEPING_GROUP, entry_id)
+    pipe.xdel(BOOKKEEPING_STREAM, entry_id)
+    await pipe.execute()
+
+
+async def _process_session(items: List[Tuple[str, Dict, int]], llm):
+    for entry_id, job, attempts in items:
+        try:
+            await run_bookkeeping(job, llm)
+
+        except Exception as e:
+            if attempts < BOOKKEEPING_MAX_ATTEMPTS:
+                # Left pending; redelivered once it has been idle long enough
+                print(f"Bookkeeping job {entry_id} failed (attempt {attempts}):", e)
+                continue
+            print(f"Bookkeeping job {entry_id} dropped after {attempts} attempts:", e)
+
+        await _ack(entry_id)
+
+
+async def _delivery_counts(entries) -> Dict[str, int]:
+    """
+    Times each claimed entry has been delivered, from the group's pending
+    list, so retry counts hold across restarts and workers.
+    """
+    ids = [entry_id for entry_id, _ in entries]
+    if not ids:
+        return {}
+
+    pending = await async_redis_client.xpending_range(
+        BOOKKEEPING_STREAM,
+        BOOKKEEPING_GROUP,
+        min=min(ids, key=_stream_id),
+        max=max(ids, key=_stream_id),
+        count=len(ids),
+        consumername=CONSUMER_NAME
+    )
+    return {p["message_id"]: int(p["times_delivered"]) for p in pending}
+
+
+def _stream_id(entry_id: str) -> Tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+async def _process(entries, llm, deliveries: Dict[str, int]):
+    # Jobs of one session run in stream order; sessions run concurrently
+    sessions: Dict[str, List[Tuple[str, Dict, int]]] = {}
+    for entry_id, fields in entries:
+        if not fields:
+            continue
+        job = json.loads(fields["job"])
+        sessions.setdefault(job["session_id"], []).append(
+            (entry_id, job, deliveries.get(entry_id, 1))
+        )
+
+    await asyncio.gather(*[
+        _process_session(items, llm) for items in sessions.values()
+    ])
+
+
+async def _ensure_group():
+    try:
+        await async_redis_client.xgroup_create(
+            BOOKKEEPING_STREAM, BOOKKEEPING_GROUP, id="0", mkstream=True
+        )
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def bookkeeping_worker(llm):
+    """
+    Consumes the bookkeeping stream. Entries are acknowledged only after
+    they were processed; entries left pending by a crashed or failing
+    consumer are claimed again after BOOKKEEPING_CLAIM_IDLE_MS.
+    """
+    next_claim = 0.0
+    # XAUTOCLAIM cursor: a full batch of stuck entries must not keep later
+    # ones from being claimed, so the scan resumes where it stopped
+    claim_cursor = "0-0"
+    group_ready = False
+
+    while True:
+        try:
+            if not group_ready:
+                await _ensure_group()
+                group_ready = True
+
+            entries = []
+            deliveries = {}
+
+            if time.monotonic() >= next_claim:
+                claimed = await async_redis_client.xautoclaim(
+                    BOOKKEEPING_STREAM,
+                    BOOKKEEPING_GROUP,
+                    CONSUMER_NAME,
+                    min_idle_time=BOOKKEEPING_CLAIM_IDLE_MS,
+                    start_id=claim_cursor,
+                    count=BOOKKEEPING_BATCH_SIZE
+                )
+                entries.extend(claimed[1])
+                deliveries = await _delivery_counts(claimed[1])
+                claim_cursor = claimed[0]
+                if claim_cursor == "0-0":
+                    # Scan finished; start over after the idle period
+                    next_claim = time.monotonic() + BOOKKEEPING_CLAIM_IDLE_MS / 1000
+
+            response = await async_redis_client.xreadgroup(
+                BOOKKEEPING_GROUP,
+                CONSUMER_NAME,
+                {BOOKKEEPING_STREAM: ">"},
+                count=BOOKKEEPING_BATCH_SIZE,
+                block=READ_BLOCK_MS
+            )
+            for _, stream_entries in response or []:
+                entries.extend(stream_entries)
+
+            if entries:
+                await _process(entries, llm, deliveries)
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            print("Bookkeeping worker failed:", e)
+            # The group may be gone (Redis flushed); recreate it
+            group_ready = False
+            claim_cursor = "0-0"
+            await asyncio.sleep(1)
+
+
+def start_bookkeeping_worker(llm):
+    if not BACKGROUND_BOOKKEEPING or async_redis_client is None:
+        return
+    if _worker["task"] is None or _worker["task"].done():
+        _worker["task"] = asyncio.create_task(bookkeeping_worker(llm))
+        print("✅ Bookkeeping worker started")
+
+
+async def stop_bookkeeping_worker():
+    task = _worker["task"]
+    if task is None:
+        return
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    _worker["task"] = None
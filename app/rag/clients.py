@@ -1,7 +1,7 @@
 import os
 import cohere
 
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from pinecone import Pinecone
 from pinecone_text.sparse import BM25Encoder
 from langchain_groq import ChatGroq
@@ -10,8 +10,10 @@ from app.core.config import (
     OPENAI_API_KEY,
     PINECONE_API_KEY,
     COHERE_API_KEY,
-    GROQ_API_KEY
+    GROQ_API_KEY,
+    HTTP_POOL_MAX_CONNECTIONS
 )
+from app.core.http_clients import sync_http_client, async_http_client
 
 openai_client = None
 pinecone_index = None
@@ -19,23 +21,46 @@ bm25 = None
 co = None
 groq_llm = None
 
+# asyncio counterparts used by the request path
+async_openai_client = None
+async_pinecone_index = None
+async_co = None
+
 if OPENAI_API_KEY:
     os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
+    openai_client = OpenAI(
+        api_key=OPENAI_API_KEY, http_client=sync_http_client("openai")
+    )
+    async_openai_client = AsyncOpenAI(
+        api_key=OPENAI_API_KEY, http_client=async_http_client("openai")
+    )
 
 if PINECONE_API_KEY:
     os.environ["PINECONE_API_KEY"] = PINECONE_API_KEY
-    pc = Pinecone(api_key=PINECONE_API_KEY)
+    # The Pinecone SDK keeps its own (HTTP/1.1) pool; only its size is ours
+    pc = Pinecone(
+        api_key=PINECONE_API_KEY,
+        connection_pool_maxsize=HTTP_POOL_MAX_CONNECTIONS
+    )
     pinecone_index = pc.Index("multi-rag-system")
+    # Reuses the host resolved above, no extra describe call
+    async_pinecone_index = pc.IndexAsyncio(host=pinecone_index.host)
 
 bm25 = BM25Encoder.default()
 
 if COHERE_API_KEY:
-    co = cohere.ClientV2(api_key=COHERE_API_KEY)
+    co = cohere.ClientV2(
+        api_key=COHERE_API_KEY, httpx_client=sync_http_client("cohere")
+    )
+    async_co = cohere.AsyncClientV2(
+        api_key=COHERE_API_KEY, httpx_client=async_http_client("cohere")
+    )
 
 if GROQ_API_KEY:
     groq_llm = ChatGroq(
         model="llama-3.3-70b-versatile",
         temperature=0.2,
-        api_key=GROQ_API_KEY
+        api_key=GROQ_API_KEY,
+        http_client=sync_http_client("groq"),
+        http_async_client=async_http_client("groq")
     )
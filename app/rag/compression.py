@@ -0,0 +1,65 @@
+import re
+from typing import Dict, List, Set
+from app.core.config import COMPRESSION_RATIO, COMPRESSION_NEIGHBOURS
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+GAP = " … "
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+def _score(query: Dict, doc: Dict) -> float:
+    weights = dict(zip(query["indices"], query["values"]))
+    return sum(
+        weights.get(i, 0.0) * v for i, v in zip(doc["indices"], doc["values"])
+    )
+
+
+def compress_text(
+    question: str,
+    text: str,
+    encoder,
+    ratio: float = COMPRESSION_RATIO,
+    neighbours: int = COMPRESSION_NEIGHBOURS
+) -> str:
+    """
+    Keeps the sentences of `text` that best match `question` under the
+    BM25 `encoder`, each with `neighbours` sentences either side, until
+    about `ratio` of the characters are kept. Kept sentences stay in
+    their original order. Text with no lexical overlap is returned
+    unchanged.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return text
+
+    query = encoder.encode_queries([question])[0]
+    scores = [_score(query, doc) for doc in encoder.encode_documents(sentences)]
+    if not any(scores):
+        return text
+
+    target = ratio * sum(len(s) for s in sentences)
+    kept: Set[int] = set()
+    kept_chars = 0
+
+    for i in sorted(range(len(sentences)), key=lambda j: -scores[j]):
+        if kept_chars >= target or scores[i] <= 0:
+            break
+        for j in range(max(0, i - neighbours), min(len(sentences), i + neighbours + 1)):
+            if j not in kept:
+                kept.add(j)
+                kept_chars += len(sentences[j])
+
+    parts, previous = [], None
+    for i in sorted(kept):
+        if previous is not None and i != previous + 1:
+            parts.append(GAP)
+        elif previous is not None:
+            parts.append(" ")
+        parts.append(sentences[i])
+        previous = i
+
+    return "".join(parts)
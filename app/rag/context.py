@@ -0,0 +1,154 @@
+import time
+from typing import Dict, List, Optional, Tuple
+from app.rag.parent_store import parent_store
+from app.rag.compression import compress_text
+from app.core.config import CONTEXT_TOKEN_BUDGET, CONTEXT_MIN_BLOCK_TOKENS
+
+SEPARATOR = "\n---\n"
+
+# Tokenizer of the answering model; loaded on first use. Falls back to a
+# ~4 characters per token estimate when the encoding is unavailable.
+_encoder = {"loaded": False, "encoding": None}
+
+
+def _encoding():
+    if not _encoder["loaded"]:
+        _encoder["loaded"] = True
+        try:
+            import tiktoken
+            _encoder["encoding"] = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        except Exception as e:
+            print("Tokenizer unavailable, estimating context tokens:", e)
+    return _encoder["encoding"]
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def _truncate(text: str, focus: int, max_tokens: int) -> str:
+    """
+    Cuts `text` to `max_tokens`, keeping the window around character
+    offset `focus` (where the best child sits in its parent).
+    """
+    encoding = _encoding()
+    if encoding is None:
+        max_chars = max_tokens * 4
+        start = max(0, min(focus - max_chars // 4, len(text) - max_chars))
+        return text[start:start + max_chars]
+
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+
+    focus_token = len(encoding.encode(text[:focus]))
+    start = max(0, min(focus_token - max_tokens // 4, len(tokens) - max_tokens))
+    return encoding.decode(tokens[start:start + max_tokens])
+
+
+def _naive_context(top_children: List[dict]) -> str:
+    # One parent + child block per child; what the pipeline used to send
+    context = ""
+    for c in top_children:
+        parent = parent_store.get(c["metadata"].get("parent_id"))
+        parent_text = parent["text"] if parent else ""
+        context += f"{parent_text}\n{c['chunk']}\n---\n"
+    return context
+
+
+def _blocks(top_children: List[dict]) -> List[Tuple[str, int]]:
+    """
+    One (text, focus offset) block per parent, in the rank of its best
+    child. Child text already inside the parent is not repeated.
+    """
+    order: List[str] = []
+    grouped: Dict[str, List[dict]] = {}
+    for i, c in enumerate(top_children):
+        parent_id = c["metadata"].get("parent_id") or c.get("id") or f"child-{i}"
+        if parent_id not in grouped:
+            order.append(parent_id)
+            grouped[parent_id] = []
+        grouped[parent_id].append(c)
+
+    blocks = []
+    for parent_id in order:
+        children = grouped[parent_id]
+        parent = parent_store.get(parent_id)
+        parent_text = (parent or {}).get("text") or ""
+
+        extra = [
+            c["chunk"] for c in children
+            if c["chunk"] and c["chunk"] not in parent_text
+        ]
+        text = "\n".join([parent_text] + extra if parent_text else extra)
+
+        focus = text.find(children[0]["chunk"]) if children[0]["chunk"] else 0
+        blocks.append((text, max(focus, 0)))
+
+    return blocks
+
+
+def build_context(
+    top_children: List[dict],
+    question: Optional[str] = None,
+    encoder=None
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Context for the LLM from reranked children: children collapsed by
+    parent in rank order, then cut to CONTEXT_TOKEN_BUDGET. Blocks that
+    do not fit are truncated around their best child, or dropped when
+    less than CONTEXT_MIN_BLOCK_TOKENS would remain. With a `question`
+    and BM25 `encoder`, each block is first reduced to its sentences
+    that match the question. Returns (context, stats); stats include
+    `compression_seconds`, the time spent in compression alone.
+    """
+    budget = CONTEXT_TOKEN_BUDGET if CONTEXT_TOKEN_BUDGET > 0 else None
+    separator_tokens = count_tokens(SEPARATOR)
+
+    parts, used = [], 0
+    truncated = dropped = 0
+    compression_saved = 0
+    compression_seconds = 0.0
+    blocks = _blocks(top_children)
+
+    for text, focus in blocks:
+        tokens = count_tokens(text)
+
+        if question and encoder is not None:
+            t_compress_start = time.perf_counter()
+            compressed = compress_text(question, text, encoder)
+            if compressed != text:
+                compressed_tokens = count_tokens(compressed)
+                compression_saved += tokens - compressed_tokens
+                text, tokens = compressed, compressed_tokens
+                focus = 0
+            compression_seconds += time.perf_counter() - t_compress_start
+        remaining = None if budget is None else budget - used - separator_tokens
+
+        if remaining is not None and tokens > remaining:
+            if remaining < CONTEXT_MIN_BLOCK_TOKENS:
+                dropped += 1
+                continue
+            text = _truncate(text, focus, remaining)
+            tokens = count_tokens(text)
+            truncated += 1
+
+        parts.append(text)
+        used += tokens + separator_tokens
+
+    context = "".join(f"{text}{SEPARATOR}" for text in parts)
+    context_tokens = count_tokens(context)
+
+    return context, {
+        "context_tokens": context_tokens,
+        "context_tokens_saved": max(
+            0, count_tokens(_naive_context(top_children)) - context_tokens
+        ),
+        "context_parents_truncated": truncated,
+        "context_parents_dropped": dropped,
+        "compression_tokens_saved": compression_saved,
+        "compression_seconds": compression_seconds
+    }
@@ -0,0 +1,127 @@
+import time
+import asyncio
+from collections import deque
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.core.resilience import guarded_call
+from app.core.config import EMBEDDING_TIMEOUT_SECONDS
+
+# Recent batches kept for the size / queue-delay percentiles
+STATS_WINDOW = 1000
+
+
+class EmbeddingBatcher:
+    """
+    Collects single-question embedding requests from concurrent pipelines
+    for up to `window_ms` (or until `max_batch` are waiting) and sends
+    them as one list-input embeddings call.
+    """
+
+    def __init__(self, client, model: str, window_ms: float, max_batch: int):
+        self.client = client
+        self.model = model
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+
+        self._waiting: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer = None
+        # In-flight batch calls; holds a reference until each one finishes
+        self._pending = set()
+
+        self.batches = 0
+        self.items = 0
+        self._sizes = deque(maxlen=STATS_WINDOW)
+        self._delays = deque(maxlen=STATS_WINDOW)
+
+    async def embed(self, text: str) -> Tuple[list, int, float]:
+        """
+        Returns (embedding, tokens, queue_delay_s). `tokens` is this
+        text's share of the batch call, by length.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiting.append((text, future, time.perf_counter()))
+
+        if len(self._waiting) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._waiting = self._waiting, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def drain(self):
+        """
+        Sends whatever is still waiting and waits for every in-flight
+        batch (shutdown).
+        """
+        self._flush()
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        sent_at = time.perf_counter()
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+
+        self.batches += 1
+        self.items += len(batch)
+        self._sizes.append(len(batch))
+        for _, _, queued_at in batch:
+            self._delays.append(sent_at - queued_at)
+
+        try:
+            resp = await guarded_call(
+                "embedding",
+                lambda: self.client.embeddings.create(
+                    model=self.model,
+                    input=texts
+                ),
+                EMBEDDING_TIMEOUT_SECONDS,
+                hedge=True
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        embeddings = {texts[d.index]: d.embedding for d in resp.data}
+        total_chars = sum(len(t) for t in texts) or 1
+
+        counted = set()
+        for text, future, queued_at in batch:
+            if future.done():
+                # Waiter went away (client disconnected)
+                continue
+            tokens = 0
+            if text not in counted:
+                tokens = round(resp.usage.total_tokens * len(text) / total_chars)
+                counted.add(text)
+            future.set_result((embeddings[text], tokens, sent_at - queued_at))
+
+    def stats(self) -> Dict:
+        sizes = np.array(self._sizes) if self._sizes else np.zeros(1)
+        delays = np.array(self._delays) * 1000 if self._delays else np.zeros(1)
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "items": self.items,
+            "batch_size_avg": round(float(sizes.mean()), 2),
+            "batch_size_p95": round(float(np.percentile(sizes, 95)), 2),
+            "batch_size_max": int(sizes.max()),
+            "queue_delay_ms_avg": round(float(delays.mean()), 3),
+            "queue_delay_ms_p95": round(float(np.percentile(delays, 95)), 3)
+        }
@@ -0,0 +1,110 @@
+from typing import Dict, List, Optional, Tuple
+
+from app.rag.clients import async_openai_client
+from app.cache.embedding_cache import (
+    aembedding_cache_get,
+    aembedding_cache_store,
+    aembedding_cache_get_many,
+    aembedding_cache_store_many
+)
+from app.rag.embedding_batcher import EmbeddingBatcher
+from app.core.resilience import guarded_call
+from app.core.config import (
+    EMBEDDING_MODEL,
+    EMBEDDING_TIMEOUT_SECONDS,
+    EMBEDDING_BATCH_WINDOW_MS,
+    EMBEDDING_BATCH_MAX_SIZE
+)
+
+embedding_batcher = None
+if async_openai_client is not None and EMBEDDING_BATCH_WINDOW_MS > 0:
+    embedding_batcher = EmbeddingBatcher(
+        async_openai_client,
+        EMBEDDING_MODEL,
+        EMBEDDING_BATCH_WINDOW_MS,
+        EMBEDDING_BATCH_MAX_SIZE
+    )
+
+
+async def aembed_query(question: str, latency: Optional[Dict] = None) -> Tuple[list, int, bool]:
+    """
+    Returns (embedding, embedding_tokens, cache_hit). Cache misses go
+    through the micro-batcher when it is enabled; its queueing delay is
+    recorded in `latency`.
+    """
+    cached = await aembedding_cache_get(EMBEDDING_MODEL, question)
+    if cached is not None:
+        return cached, 0, True
+
+    if embedding_batcher is not None:
+        embedding, tokens, queue_delay = await embedding_batcher.embed(question)
+        if latency is not None:
+            latency["embedding_queue"] = queue_delay
+    else:
+        emb_resp = await guarded_call(
+            "embedding",
+            lambda: async_openai_client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=question
+            ),
+            EMBEDDING_TIMEOUT_SECONDS,
+            hedge=True
+        )
+        embedding = emb_resp.data[0].embedding
+        tokens = emb_resp.usage.total_tokens
+
+    await aembedding_cache_store(EMBEDDING_MODEL, question, embedding)
+
+    return embedding, tokens, False
+
+
+async def aembed_queries(questions: List[str]) -> Tuple[List[Tuple[list, int, bool]], int]:
+    """
+    Embeds many questions with at most one API call (the embeddings
+    endpoint takes a list). Returns ([(embedding, tokens, cache_hit)],
+    api_calls). The call's token count is split across the questions it
+    embedded in proportion to their length.
+    """
+    cached = await aembedding_cache_get_many(EMBEDDING_MODEL, questions)
+    results = [(emb, 0, True) for emb in cached]
+
+    missing = list(dict.fromkeys(
+        q for q, emb in zip(questions, cached) if emb is None
+    ))
+    if not missing:
+        return results, 0
+
+    emb_resp = await guarded_call(
+        "embedding",
+        lambda: async_openai_client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=missing
+        ),
+        EMBEDDING_TIMEOUT_SECONDS,
+        hedge=True
+    )
+    # Items come back with their input index
+    embedded = {
+        missing[d.index]: d.embedding
+        for d in emb_resp.data
+    }
+    await aembedding_cache_store_many(
+        EMBEDDING_MODEL, missing, [embedded[q] for q in missing]
+    )
+
+    total_chars = sum(len(q) for q in missing) or 1
+    tokens = {
+        q: round(emb_resp.usage.total_tokens * len(q) / total_chars)
+        for q in missing
+    }
+
+    attributed = set()
+    for i, (question, emb) in enumerate(zip(questions, cached)):
+        if emb is not None:
+            continue
+        # Duplicates in the batch share one embedding; count tokens once
+        share = 0 if question in attributed else tokens[question]
+        attributed.add(question)
+        results[i] = (embedded[question], share, False)
+
+    return results, 1
@@ -0,0 +1,70 @@
+import time
+import asyncio
+from typing import Dict
+
+from app.rag.clients import async_openai_client, async_pinecone_index, async_co
+from app.cache.redis_client import async_redis_client
+from app.core.config import (
+    EMBEDDING_MODEL,
+    WARMUP_CONNECTIONS,
+    WARMUP_TIMEOUT_SECONDS
+)
+
+_status = {"ready": False, "warmup_ms": None, "dependencies": {}}
+
+
+def _targets() -> Dict:
+    """
+    The cheapest authenticated call per dependency; each opens (and
+    leaves in the pool) a connection, with TLS already negotiated.
+    """
+    targets = {}
+    if async_openai_client is not None:
+        targets["openai"] = lambda: async_openai_client.models.retrieve(EMBEDDING_MODEL)
+    if async_pinecone_index is not None:
+        targets["pinecone"] = lambda: async_pinecone_index.describe_index_stats()
+    if async_co is not None:
+        targets["cohere"] = lambda: async_co.models.list(page_size=1)
+    if async_redis_client is not None:
+        targets["redis"] = lambda: async_redis_client.ping()
+    return targets
+
+
+async def _warm(name: str, factory):
+    t_start = time.perf_counter()
+    try:
+        # Concurrent calls so more than one connection is open (HTTP/1.1)
+        await asyncio.wait_for(
+            asyncio.gather(*[factory() for _ in range(max(1, WARMUP_CONNECTIONS))]),
+            WARMUP_TIMEOUT_SECONDS
+        )
+        _status["dependencies"][name] = {
+            "ok": True,
+            "ms": round((time.perf_counter() - t_start) * 1000, 1)
+        }
+
+    except Exception as e:
+        print(f"Warm-up of {name} failed:", repr(e))
+        _status["dependencies"][name] = {"ok": False, "error": repr(e)}
+
+
+async def warm_connections():
+    """
+    Opens connections to every configured dependency, then marks the
+    worker ready. A dependency that fails to answer does not hold
+    readiness back; its circuit breaker handles it from here.
+    """
+    t_start = time.perf_counter()
+    try:
+        await asyncio.gather(*[
+            _warm(name, factory) for name, factory in _targets().items()
+        ])
+    finally:
+        _status["warmup_ms"] = round((time.perf_counter() - t_start) * 1000, 1)
+        _status["ready"] = True
+        failed = [n for n, s in _status["dependencies"].items() if not s["ok"]]
+        print(f"✅ Connections warmed in {_status['warmup_ms']} ms", f"(failed: {failed})" if failed else "")
+
+
+def readiness() -> Dict:
+    return dict(_status)
@@ -0,0 +1,76 @@
+import math
+from typing import Dict, List, Optional, Tuple
+from app.core.config import (
+    ADAPTIVE_RERANK,
+    RERANK_SKIP_MARGIN,
+    RERANK_SKIP_MIN_SCORE,
+    RERANK_SKIP_MAX_ENTROPY,
+    RERANK_CANDIDATE_WINDOW
+)
+
+SKIP = "skip"
+SHRINK = "shrink"
+FULL = "full"
+
+
+def default_policy() -> Optional[Dict[str, float]]:
+    if not ADAPTIVE_RERANK:
+        return None
+    return {
+        "margin": RERANK_SKIP_MARGIN,
+        "min_score": RERANK_SKIP_MIN_SCORE,
+        "max_entropy": RERANK_SKIP_MAX_ENTROPY,
+        "window": RERANK_CANDIDATE_WINDOW
+    }
+
+
+def score_entropy(scores: List[float]) -> float:
+    """
+    Entropy of the scores taken as a distribution, normalized to [0, 1].
+    Low values mean a few candidates hold most of the score.
+    """
+    scores = [max(s, 0.0) for s in scores]
+    total = sum(scores)
+    if len(scores) < 2 or total <= 0:
+        return 0.0
+
+    entropy = -sum(s / total * math.log(s / total) for s in scores if s > 0)
+    return entropy / math.log(len(scores))
+
+
+def rerank_plan(
+    candidates: List[dict],
+    policy: Optional[Dict[str, float]]
+) -> Tuple[str, List[dict]]:
+    """
+    Decides from the hybrid scores (candidates in Pinecone order) how
+    much reranking is needed:
+    - SKIP: the top match clears `min_score`, leads the runner-up by
+      `margin` and the score entropy is at most `max_entropy`
+    - SHRINK: only candidates within `window` of the top score go to the
+      reranker
+    - FULL: everything is reranked
+    Returns (decision, candidates to rerank or, for SKIP, to keep).
+    """
+    if policy is None or not candidates:
+        return FULL, candidates
+
+    scores = [c["score"] for c in candidates]
+    top = scores[0]
+    runner_up = scores[1] if len(scores) > 1 else 0.0
+
+    if (
+        top >= policy["min_score"]
+        and top - runner_up >= policy["margin"]
+        and score_entropy(scores) <= policy["max_entropy"]
+    ):
+        return SKIP, candidates
+
+    if policy["window"] > 0:
+        shortlist = [c for c in candidates if c["score"] >= top - policy["window"]]
+        if len(shortlist) == 1:
+            return SKIP, candidates
+        if len(shortlist) < len(candidates):
+            return SHRINK, shortlist
+
+    return FULL, candidates
@@ -0,0 +1,219 @@
+import re
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from app.rag.clients import async_co
+from app.rag.parent_store import parent_store
+from app.core.resilience import guarded_call
+from app.core.config import (
+    RERANKER,
+    RERANKER_BY_ROLE,
+    RERANKER_FALLBACK,
+    RERANKER_TIMEOUT_SECONDS,
+    RERANK_SCORE_THRESHOLD,
+    LOCAL_RERANK_MIN_SCORE,
+    LOCAL_RERANK_PARENT_WEIGHT
+)
+
+_TOKEN = re.compile(r"\w+")
+
+
+class Reranker(ABC):
+    """
+    Scores candidate children against a question. `arerank` returns
+    (candidate index, score) pairs, best first; `threshold` is the
+    minimum score worth sending to the LLM on this backend's scale.
+    """
+
+    name = "base"
+    billable = False
+    threshold = 0.0
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def arerank(self, question: str, candidates: List[dict]) -> List[Tuple[int, float]]:
+        ...
+
+
+class CohereReranker(Reranker):
+    name = "cohere"
+    billable = True
+    threshold = RERANK_SCORE_THRESHOLD
+
+    def __init__(self, model: str = "rerank-v3.5"):
+        self.model = model
+
+    @property
+    def available(self) -> bool:
+        return async_co is not None
+
+    @staticmethod
+    def _ranked(response) -> List[Tuple[int, float]]:
+        ranked = [(r.index, r.relevance_score) for r in response.results]
+        return sorted(ranked, key=lambda r: r[1], reverse=True)
+
+    async def arerank(self, question: str, candidates: List[dict]) -> List[Tuple[int, float]]:
+        docs = [c["chunk"] for c in candidates]
+        response = await async_co.rerank(
+            model=self.model, query=question, documents=docs, top_n=len(docs)
+        )
+        return self._ranked(response)
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def bm25_scores(question: str, docs: List[str], k1: float = 1.2, b: float = 0.75) -> np.ndarray:
+    """
+    Okapi BM25 of each doc for `question`, with IDF taken over `docs`
+    themselves. Only query terms get a column, so the matrix stays
+    len(docs) x len(query terms).
+    """
+    terms = {t: i for i, t in enumerate(dict.fromkeys(_tokens(question)))}
+    if not terms or not docs:
+        return np.zeros(len(docs), dtype=np.float32)
+
+    tf = np.zeros((len(docs), len(terms)), dtype=np.float32)
+    lengths = np.zeros(len(docs), dtype=np.float32)
+    for d, text in enumerate(docs):
+        tokens = _tokens(text)
+        lengths[d] = len(tokens)
+        for token in tokens:
+            i = terms.get(token)
+            if i is not None:
+                tf[d, i] += 1
+
+    df = (tf > 0).sum(axis=0)
+    idf = np.log1p((len(docs) - df + 0.5) / (df + 0.5))
+    norm = k1 * (1 - b + b * lengths / (lengths.mean() or 1.0))
+
+    return (tf * (k1 + 1) / (tf + norm[:, None])) @ idf
+
+
+class LexicalReranker(Reranker):
+    """
+    In-process BM25 over each child and, at `parent_weight`, its parent
+    text. Scores are scaled so the best candidate is 1.0. No network.
+    """
+
+    name = "local"
+    threshold = LOCAL_RERANK_MIN_SCORE
+
+    def __init__(self, parent_weight: float = LOCAL_RERANK_PARENT_WEIGHT):
+        self.parent_weight = parent_weight
+
+    async def arerank(self, question: str, candidates: List[dict]) -> List[Tuple[int, float]]:
+        # A few dozen short texts: cheap enough to score on the event loop
+        scores = bm25_scores(question, [c["chunk"] for c in candidates])
+
+        if self.parent_weight > 0:
+            parents = [
+                (parent_store.get(c["metadata"].get("parent_id")) or {}).get("text") or ""
+                for c in candidates
+            ]
+            scores = scores + self.parent_weight * bm25_scores(question, parents)
+
+        top = float(scores.max()) if len(scores) else 0.0
+        if top <= 0:
+            # No word in common: keep the hybrid order
+            return [(i, 0.0) for i in range(len(candidates))]
+
+        scores = scores / top
+        order = np.argsort(-scores, kind="stable")
+        return [(int(i), float(scores[i])) for i in order]
+
+
+RERANKERS: Dict[str, Reranker] = {
+    "cohere": CohereReranker(),
+    "local": LexicalReranker()
+}
+
+
+def _backend(name: Optional[str]) -> Optional[Reranker]:
+    backend = RERANKERS.get(name or "")
+    if backend is None or not backend.available:
+        return None
+    return backend
+
+
+def reranker_for(role: Optional[str]) -> Tuple[Optional[Reranker], Optional[Reranker]]:
+    """
+    (primary, fallback) for `role`: RERANKER_BY_ROLE, else RERANKER. An
+    unavailable primary (e.g. no Cohere key) is replaced by the fallback.
+    """
+    primary = _backend(RERANKER_BY_ROLE.get(role, RERANKER))
+    fallback = _backend(RERANKER_FALLBACK)
+
+    if primary is None:
+        return fallback, None
+    if fallback is primary:
+        return primary, None
+    return primary, fallback
+
+
+async def arerank_with_fallback(
+    question: str,
+    candidates: List[dict],
+    role: Optional[str] = None,
+    timeout: Optional[float] = None
+) -> Tuple[Optional[List[Tuple[int, float]]], Dict]:
+    """
+    Runs the role's reranker with RERANKER_TIMEOUT_SECONDS (or the
+    shorter `timeout` left in the request). On timeout, error or an open
+    circuit breaker the fallback backend answers instead. Returns
+    (ranking or None when no backend could rank, usage stats).
+    `reranker_calls` counts billable calls only; `reranker_attempts`
+    counts calls per backend, failed ones included. `reranker_degraded`
+    is set when the role's primary backend did not produce the ranking.
+    """
+    stats = {
+        "reranker_calls": 0,
+        "reranker_backend": None,
+        "reranker_failures": 0,
+        "reranker_attempts": {},
+        "reranker_degraded": True
+    }
+    if timeout is None:
+        timeout = RERANKER_TIMEOUT_SECONDS
+    timeout = min(timeout, RERANKER_TIMEOUT_SECONDS)
+
+    def attempt(backend: Reranker):
+        attempts = stats["reranker_attempts"]
+        attempts[backend.name] = attempts.get(backend.name, 0) + 1
+
+    async def billable_call(backend: Reranker):
+        stats["reranker_calls"] += 1
+        attempt(backend)
+        return await backend.arerank(question, candidates)
+
+    primary, fallback = reranker_for(role)
+    for backend in (primary, fallback):
+        if backend is None:
+            continue
+
+        if backend.billable and timeout <= 0:
+            # No time left in the request for a network rerank
+            continue
+
+        try:
+            if backend.billable:
+                ranked = await guarded_call(
+                    "reranker", lambda: billable_call(backend), timeout
+                )
+            else:
+                attempt(backend)
+                ranked = await backend.arerank(question, candidates)
+            stats["reranker_backend"] = backend.name
+            stats["reranker_degraded"] = backend is not primary
+            return ranked, stats
+
+        except Exception as e:
+            print(f"Reranker {backend.name} failed:", repr(e))
+            stats["reranker_failures"] += 1
+
+    return None, stats
@@ -0,0 +1,116 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from app.rag.clients import bm25, async_pinecone_index
+from app.rag.rerank_policy import SKIP, default_policy, rerank_plan
+from app.rag.rerankers import RERANKERS, arerank_with_fallback
+from app.core.resilience import guarded_call
+from app.core.config import TOP_K, PINECONE_TIMEOUT_SECONDS
+
+# Candidates kept, in hybrid order, when the reranker is skipped or fails
+UNRERANKED_TOP_N = 3
+
+
+def _encode_sparse(question: str):
+    try:
+        return bm25.encode_queries([question])[0]
+    except Exception:
+        return None
+
+
+def _query_args(query_embedding: list, query_sparse, role: str) -> dict:
+    args = {
+        "vector": query_embedding,
+        "top_k": TOP_K,
+        "include_metadata": True,
+        "filter": {role: {"$eq": True}}
+    }
+
+    if query_sparse:
+        args["sparse_vector"] = query_sparse
+
+    return args
+
+
+def _candidates(results) -> List[dict]:
+    allowed = []
+    for m in results.matches:
+        meta = m.metadata or {}
+        allowed.append({
+            "chunk": meta.get("text", ""),
+            "metadata": meta,
+            "id": m.id,
+            "score": m.score
+        })
+
+    return allowed
+
+
+async def aencode_sparse(question: str):
+    # BM25 encoding is CPU-bound; keep it off the event loop
+    return await asyncio.to_thread(_encode_sparse, question)
+
+
+async def aquery_index(query_embedding: list, query_sparse, role: str) -> List[dict]:
+    results = await guarded_call(
+        "pinecone",
+        lambda: async_pinecone_index.query(
+            **_query_args(query_embedding, query_sparse, role)
+        ),
+        PINECONE_TIMEOUT_SECONDS,
+        hedge=True
+    )
+    return _candidates(results)
+
+
+def _select(candidates: List[dict], ranked: List[Tuple[int, float]], threshold: float) -> List[dict]:
+    selected = []
+    for index, score in ranked:
+        doc = candidates[index]
+        doc["rerank_score"] = score
+        if score >= threshold:
+            selected.append(doc)
+
+    return selected[:3]
+
+
+def _unranked_stats() -> Dict:
+    return {
+        "reranker_calls": 0,
+        "reranked_docs": 0,
+        "reranker_backend": None,
+        "reranker_failures": 0,
+        "reranker_attempts": {},
+        "reranker_degraded": False
+    }
+
+
+def _finish_rerank(candidates: List[dict], ranked, stats: Dict) -> Tuple[List[dict], Dict]:
+    if ranked is None:
+        return candidates[:UNRERANKED_TOP_N], stats
+
+    stats["reranked_docs"] = len(candidates)
+    backend = RERANKERS[stats["reranker_backend"]]
+    return _select(candidates, ranked, backend.threshold), stats
+
+
+async def arerank_children(
+    question: str,
+    allowed: List[dict],
+    role: Optional[str] = None,
+    policy: Optional[Dict[str, float]] = None,
+    timeout: Optional[float] = None
+) -> Tuple[List[dict], Dict]:
+    """
+    Returns (top_children, rerank usage). The backend is picked per role
+    (RERANKER / RERANKER_BY_ROLE) and falls back to RERANKER_FALLBACK on
+    failure. With ADAPTIVE_RERANK (or an explicit `policy`) a clear
+    hybrid-score winner skips the reranker and a narrow lead shrinks its
+    input.
+    """
+    decision, candidates = rerank_plan(allowed, policy or default_policy())
+    if decision == SKIP:
+        return candidates[:UNRERANKED_TOP_N], _unranked_stats()
+
+    ranked, stats = await arerank_with_fallback(question, candidates, role, timeout)
+    return _finish_rerank(candidates, ranked, {**_unranked_stats(), **stats})
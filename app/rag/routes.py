@@ -1,29 +1,72 @@
+import json
 import time
+import asyncio
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-from app.models.query import Query
+from app.models.query import Query, BatchQuery
 from app.core.security import get_current_user
 from app.rag.clients import (
-    openai_client,
-    pinecone_index,
-    bm25,
-    co
+    async_openai_client,
+    async_pinecone_index,
+    bm25
 )
-from app.rag.parent_store import parent_store
+from app.rag.embeddings import aembed_query, aembed_queries
+from app.rag.retrieval import (
+    aencode_sparse,
+    aquery_index,
+    arerank_children
+)
+from app.rag.context import build_context
 
+from app.cache.exact_cache import (
+    aexact_cache_lookup,
+    astore_exact_cache
+)
 from app.cache.semantic_cache import (
-    semantic_cache_lookup,
-    store_semantic_cache
+    asemantic_cache_lookup,
+    asemantic_cache_lookup_many
 )
-from app.cache.memory import (
-    build_memory_context,
-    store_turn,
-    maybe_summarize
+from app.cache.negative_cache import (
+    anegative_cache_lookup_exact,
+    anegative_cache_lookup_semantic,
+    astore_negative_cache
 )
-
+from app.cache.retrieval_cache import (
+    aretrieval_cache_lookup,
+    astore_retrieval_cache
+)
+from app.cache.access import answer_access
+from app.cache.normalize import normalize_question
+from app.cache.hot_questions import record_question
 from app.core.config import (
-    TOP_K,
-    RERANK_SCORE_THRESHOLD
+    SINGLE_FLIGHT,
+    CONCURRENT_STAGES,
+    SPECULATIVE_RETRIEVAL,
+    ASK_BATCH_MAX_QUESTIONS,
+    ASK_BATCH_CONCURRENCY,
+    CONTEXT_COMPRESSION_ROUTES,
+    REQUEST_DEADLINE_SECONDS,
+    RERANKER_TIMEOUT_SECONDS,
+    LLM_TIMEOUT_SECONDS,
+    LLM_RESERVE_SECONDS,
+    RETRIEVAL_CACHE_DEGRADED_TTL
+)
+from app.cache.memory import SYSTEM_PROMPT, abuild_memory_context, ahas_memory
+from app.cache.index_version import get_index_version
+from app.rag.bookkeeping import submit_bookkeeping
+from app.rag.single_flight import Flight, join_flight
+from app.core.metrics import record_cache, record_request
+from app.core.flight_recorder import record_flight
+from app.core.http_clients import sync_http_client, async_http_client
+from app.core.resilience import (
+    DependencyUnavailable,
+    bind_usage,
+    breakers,
+    trackers,
+    guarded_call
 )
 
 from langchain_core.messages import SystemMessage, HumanMessage
@@ -33,219 +76,809 @@ router = APIRouter()
 
 llm = ChatOpenAI(
     model="gpt-3.5-turbo",
-    temperature=0.2
+    temperature=0.2,
+    # Same connection pool as the embedding calls
+    http_client=sync_http_client("openai"),
+    http_async_client=async_http_client("openai"),
+    # Token counts on the final chunk of /ask_stream
+    stream_usage=True
 )
 
 
-def run_rag_pipeline(payload, current_user, include_metrics: bool):
-    t0 = time.perf_counter()
+NO_DATA_ANSWER = "No data found"
 
-    semantic_cache_hit = False
 
-    if openai_client is None or pinecone_index is None or bm25 is None:
-        raise HTTPException(status_code=500, detail="Server not configured")
+def _respond(answer, include_metrics, t0, latency, usage, cache, overlapped=None):
+    """
+    `latency` holds the time the request spent waiting on each stage (the
+    critical path). `overlapped` holds the full duration of stages that
+    ran concurrently with it.
+    """
+    if not include_metrics:
+        return {"answer": answer}
 
-    role = current_user["role"]
-    question = payload.question
-    session_id = current_user["user_id"]
+    result = {
+        "answer": answer,
+        "latency": {
+            "total": round(time.perf_counter() - t0, 3),
+            **{stage: round(t, 3) for stage, t in latency.items()}
+        },
+        "usage": usage,
+        "cache": cache
+    }
+    if overlapped:
+        result["overlapped"] = {
+            stage: round(t, 3) for stage, t in overlapped.items()
+        }
+    return result
 
-    t_embed_start = time.perf_counter()
 
-    emb_resp = openai_client.embeddings.create(
-        model="text-embedding-3-small",
-        input=question
-    )
+async def _timed(aw, overlapped: dict, name: str):
+    t_start = time.perf_counter()
+    try:
+        return await aw
+    finally:
+        overlapped[name] = time.perf_counter() - t_start
 
-    query_embedding = emb_resp.data[0].embedding
-    embedding_tokens = emb_resp.usage.total_tokens
-    embed_time = time.perf_counter() - t_embed_start
 
-    cached_answer, _ = semantic_cache_lookup(role, query_embedding)
+def _start(aw, overlapped: dict, name: str) -> asyncio.Task:
+    """
+    Runs a stage off the critical path; its duration lands in
+    overlapped[name].
+    """
+    return asyncio.create_task(_timed(aw, overlapped, name))
 
-    if cached_answer:
-        semantic_cache_hit = True
-
-        total_time = time.perf_counter() - t0
-
-        if not include_metrics:
-            return {"answer": cached_answer["answer"]}
-
-        return {
-            "answer": cached_answer["answer"],
-            "latency": {
-                "total": round(total_time, 3),
-                "embedding": round(embed_time, 3)
-            },
-            "usage": {
-                "embedding_tokens": embedding_tokens,
-                "llm_input_tokens": 0,
-                "llm_output_tokens": 0,
-                "reranker_calls": 0
-            },
-            "cache": {
-                "semantic_cache_hit": True
-            }
-        }
 
-    t_retrieval_start = time.perf_counter()
+def _discard(task: Optional[asyncio.Task]) -> Optional[bool]:
+    """
+    Cancels a stage whose result is no longer needed. Returns None when
+    there was no task.
+    """
+    if task is None:
+        return None
 
+    # Retrieve the outcome so a failed, discarded task is not logged
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return task.cancel()
+
+
+def _remaining(state: dict) -> Optional[float]:
+    if state["deadline"] is None:
+        return None
+    return state["deadline"] - time.perf_counter()
+
+
+async def _stage(state: dict, name: str, aw):
+    """
+    Awaits a stage within what is left of the request deadline. A
+    dependency that timed out or whose breaker is open fails the request
+    with 504 / 503; the caches were already consulted by then.
+    """
+    remaining = _remaining(state)
     try:
-        query_sparse = bm25.encode_queries([question])[0]
-    except Exception:
-        query_sparse = None
-
-    args = {
-        "vector": query_embedding,
-        "top_k": TOP_K,
-        "include_metadata": True,
-        "filter": {role: {"$eq": True}}
+        if remaining is not None and remaining <= 0:
+            raise asyncio.TimeoutError()
+        return await asyncio.wait_for(aw, remaining)
+
+    except asyncio.TimeoutError:
+        if asyncio.iscoroutine(aw):
+            aw.close()
+        record_flight(state, error=f"{name} timed out")
+        raise HTTPException(status_code=504, detail=f"{name} timed out")
+
+    except DependencyUnavailable as e:
+        record_flight(state, error=f"{e.name} unavailable")
+        raise HTTPException(
+            status_code=503,
+            detail=f"{e.name} temporarily unavailable; only cached answers can be served"
+        )
+
+
+def _llm_reserve() -> float:
+    p95 = trackers["llm"].p95()
+    reserve = p95 if p95 is not None else LLM_RESERVE_SECONDS
+    return min(reserve, LLM_TIMEOUT_SECONDS)
+
+
+async def _search(question: str, query_embedding: list, role: str, sparse_task):
+    if sparse_task is not None:
+        query_sparse = await sparse_task
+    else:
+        query_sparse = await aencode_sparse(question)
+    return await aquery_index(query_embedding, query_sparse, role)
+
+
+async def _no_answer():
+    return None, None
+
+
+async def _lookup_caches(role: str, question: str, query_embedding: list, semantic: bool = True):
+    """
+    Returns (semantic cache answer, negative cache hit, cached children).
+    Sequential lookups stop at the first hit; concurrent ones run at once.
+    """
+    if CONCURRENT_STAGES:
+        (cached_answer, _), negative_hit, top_children = await asyncio.gather(
+            asemantic_cache_lookup(role, query_embedding) if semantic else _no_answer(),
+            anegative_cache_lookup_semantic(role, query_embedding),
+            aretrieval_cache_lookup(role, question)
+        )
+        if semantic:
+            record_cache("semantic", role, bool(cached_answer))
+        record_cache("negative_semantic", role, bool(negative_hit))
+        record_cache("retrieval", role, top_children is not None)
+        return cached_answer, negative_hit, top_children
+
+    if semantic:
+        cached_answer, _ = await asemantic_cache_lookup(role, query_embedding)
+        record_cache("semantic", role, bool(cached_answer))
+        if cached_answer:
+            return cached_answer, False, None
+
+    negative_hit = await anegative_cache_lookup_semantic(role, query_embedding)
+    record_cache("negative_semantic", role, bool(negative_hit))
+    if negative_hit:
+        return None, True, None
+
+    top_children = await aretrieval_cache_lookup(role, question)
+    record_cache("retrieval", role, top_children is not None)
+    return None, False, top_children
+
+
+def _new_state(payload, current_user, compress: bool = False) -> dict:
+    if async_openai_client is None or async_pinecone_index is None or bm25 is None:
+        raise HTTPException(status_code=500, detail="Server not configured")
+
+    t0 = time.perf_counter()
+    usage = {
+        "embedding_tokens": 0,
+        "llm_input_tokens": 0,
+        "llm_output_tokens": 0,
+        "reranker_calls": 0,
+        "reranked_docs": 0,
+        "reranker_backend": None,
+        "reranker_failures": 0,
+        "reranker_attempts": {},
+        "reranker_degraded": False,
+        "pinecone_queries": 0,
+        "speculative_queries_discarded": 0,
+        "hedged_requests": 0,
+        "context_tokens": 0,
+        "context_tokens_saved": 0,
+        "context_parents_truncated": 0,
+        "context_parents_dropped": 0,
+        "compression_tokens_saved": 0
     }
+    bind_usage(usage)
 
-    if query_sparse:
-        args["sparse_vector"] = query_sparse
-
-    results = pinecone_index.query(**args)
-    retrieval_time = time.perf_counter() - t_retrieval_start
-
-    if not results.matches:
-        total_time = time.perf_counter() - t0
-
-        if not include_metrics:
-            return {"answer": "No data found"}
-
-        return {
-            "answer": "No data found",
-            "latency": {
-                "total": round(total_time, 3),
-                "embedding": round(embed_time, 3),
-                "retrieval": round(retrieval_time, 3)
-            },
-            "usage": {
-                "embedding_tokens": embedding_tokens,
-                "llm_input_tokens": 0,
-                "llm_output_tokens": 0,
-                "reranker_calls": 0
-            },
-            "cache": {
-                "semantic_cache_hit": False
-            }
-        }
+    return {
+        "t0": t0,
+        "deadline": t0 + REQUEST_DEADLINE_SECONDS,
+        "role": current_user["role"],
+        "question": payload.question,
+        "session_id": current_user["user_id"],
+        "compress": compress,
+        "latency": {},
+        "usage": usage,
+        "cache": {
+            "exact_cache_hit": False,
+            "negative_cache_hit": False,
+            "embedding_cache_hit": False,
+            "semantic_cache_hit": False,
+            "retrieval_cache_hit": False,
+            "coalesced": False
+        },
+        "overlapped": {},
+        "answer": None
+    }
 
-    allowed = []
-    for m in results.matches:
-        meta = m.metadata or {}
-        allowed.append({
-            "chunk": meta.get("text", ""),
-            "metadata": meta,
-            "id": m.id
-        })
-
-    t_rerank_start = time.perf_counter()
-    reranker_calls = 1
-    top_children = allowed[:5]
-
-    if co:
-        docs = [a["chunk"] for a in allowed]
-        try:
-            rerank_response = co.rerank(
-                model="rerank-v3.5",
-                query=question,
-                documents=docs,
-                top_n=len(docs)
-            )
 
-            reranked = []
-            for r in rerank_response.results:
-                doc = allowed[r.index]
-                doc["rerank_score"] = r.relevance_score
-                reranked.append(doc)
+async def _check_exact(state: dict) -> bool:
+    """
+    Exact and negative-exact tiers; neither needs an embedding. Returns
+    True when one of them settled the question.
+    """
+    role, question = state["role"], state["question"]
+    latency, cache = state["latency"], state["cache"]
 
-            reranked.sort(key=lambda x: x["rerank_score"], reverse=True)
+    t_exact_start = time.perf_counter()
+    exact_answer = await aexact_cache_lookup(role, question)
+    exact_time = time.perf_counter() - t_exact_start
+    record_cache("exact", role, bool(exact_answer))
 
-            top_children = [
-                r for r in reranked
-                if r["rerank_score"] >= RERANK_SCORE_THRESHOLD
-            ][:3]
+    if exact_answer:
+        cache["exact_cache_hit"] = True
+        latency["exact_cache_hit"] = exact_time
+        state["answer"] = exact_answer["answer"]
+        return True
 
-        except Exception:
-            top_children = allowed[:3]
+    latency["exact_cache"] = exact_time
 
-    rerank_time = time.perf_counter() - t_rerank_start
+    t_negative_start = time.perf_counter()
+    negative_hit = await anegative_cache_lookup_exact(role, question)
+    record_cache("negative_exact", role, bool(negative_hit))
+    if negative_hit:
+        cache["negative_cache_hit"] = True
+        latency["negative_cache_hit"] = time.perf_counter() - t_negative_start
+        state["answer"] = NO_DATA_ANSWER
+        return True
 
-    context = ""
-    for c in top_children:
-        parent = parent_store.get(c["metadata"].get("parent_id"))
-        parent_text = parent["text"] if parent else ""
-        context += f"{parent_text}\n{c['chunk']}\n---\n"
+    return False
 
-    memory_messages = build_memory_context(session_id)
 
-    t_llm_start = time.perf_counter()
+def _set_embedding(state: dict, embedding: list, tokens: int, cache_hit: bool, elapsed: float):
+    record_cache("embedding", state["role"], cache_hit)
+    state["embedding"] = embedding
+    state["latency"]["embedding"] = elapsed
+    state["usage"]["embedding_tokens"] = tokens
+    state["cache"]["embedding_cache_hit"] = cache_hit
 
-    response = llm.invoke(
-        memory_messages + [
-            SystemMessage(content="Answer only from context."),
-            HumanMessage(
-                content=f"Context:\n{context}\n\nQuestion: {question}"
-            )
-        ]
+
+async def _prepare(payload, current_user, use_memory: bool, compress: bool = False) -> dict:
+    """
+    Runs everything up to the LLM call: cache tiers, RBAC-filtered
+    retrieval, rerank and context assembly. The returned state carries
+    `answer` when a cache or the no-data path already settled the
+    question, otherwise the `messages` to send to the LLM.
+    """
+    state = _new_state(payload, current_user, compress)
+    if await _check_exact(state):
+        return state
+
+    return await _embed_and_retrieve(state, use_memory)
+
+
+def _use_shared(state: dict, shared: dict):
+    state["cache"]["coalesced"] = True
+    state["answer"] = shared["answer"]
+    state["access"] = shared["access"]
+
+
+async def _embed_and_retrieve(state: dict, use_memory: bool, flight: Optional[Flight] = None) -> dict:
+    sparse_task = None
+    if CONCURRENT_STAGES:
+        sparse_task = _start(
+            aencode_sparse(state["question"]), state["overlapped"], "bm25"
+        )
+
+    t_embed_start = time.perf_counter()
+    query_embedding, embedding_tokens, embedding_cache_hit = await _stage(
+        state, "embedding", aembed_query(state["question"], state["latency"])
+    )
+    _set_embedding(
+        state,
+        query_embedding,
+        embedding_tokens,
+        embedding_cache_hit,
+        time.perf_counter() - t_embed_start
     )
 
-    answer = response.content
+    if flight is not None:
+        flight.attach_embedding(query_embedding)
+        shared = await flight.follow_near_duplicate(state["latency"])
+        if shared is not None:
+            _discard(sparse_task)
+            _use_shared(state, shared)
+            return state
 
-    llm_input_tokens = response.usage_metadata["input_tokens"]
-    llm_output_tokens = response.usage_metadata["output_tokens"]
+    return await _retrieve(state, use_memory, sparse_task)
 
-    llm_time = time.perf_counter() - t_llm_start
-    total_time = time.perf_counter() - t0
 
-    store_semantic_cache(
-        role=role,
-        question=question,
-        embedding=query_embedding,
-        answer={"answer": answer}
+async def _use_semantic_hit(state: dict, cached_answer: dict):
+    state["cache"]["semantic_cache_hit"] = True
+    # Promote to the exact tier so a repeat skips the embedding
+    await astore_exact_cache(
+        cached_answer.get("access", [state["role"]]),
+        state["question"],
+        cached_answer
+    )
+    state["answer"] = cached_answer["answer"]
+
+
+async def _retrieve(
+    state: dict,
+    use_memory: bool,
+    sparse_task: Optional[asyncio.Task] = None,
+    semantic_checked: bool = False
+) -> dict:
+    """
+    Remaining cache tiers, retrieval, rerank and context assembly for an
+    embedded question. `semantic_checked` skips the semantic tier when
+    the caller already resolved it (batch requests).
+    """
+    role, question = state["role"], state["question"]
+    session_id = state["session_id"]
+    latency, usage, cache = state["latency"], state["usage"], state["cache"]
+    overlapped = state["overlapped"]
+    query_embedding = state["embedding"]
+
+    search_task = None
+    if CONCURRENT_STAGES and SPECULATIVE_RETRIEVAL:
+        search_task = _start(
+            _search(question, query_embedding, role, sparse_task),
+            overlapped,
+            "speculative_retrieval"
+        )
+        usage["pinecone_queries"] += 1
+
+    t_lookup_start = time.perf_counter()
+    cached_answer, negative_hit, top_children = await _lookup_caches(
+        role, question, query_embedding, semantic=not semantic_checked
     )
+    latency["cache_lookup"] = time.perf_counter() - t_lookup_start
 
-    store_turn(
-        session_id,
-        {
-            "user": question,
-            "assistant": answer,
-            "ts": time.time()
-        }
+    if cached_answer or negative_hit or top_children is not None:
+        _discard(sparse_task)
+        if _discard(search_task) is not None:
+            usage["speculative_queries_discarded"] += 1
+
+    if cached_answer:
+        await _use_semantic_hit(state, cached_answer)
+        return state
+
+    if negative_hit:
+        cache["negative_cache_hit"] = True
+        latency["negative_cache_hit"] = latency.pop("cache_lookup")
+        state["answer"] = NO_DATA_ANSWER
+        return state
+
+    memory_task = None
+    if use_memory and CONCURRENT_STAGES:
+        memory_task = _start(
+            abuild_memory_context(session_id), overlapped, "memory"
+        )
+
+    try:
+        if top_children is not None:
+            cache["retrieval_cache_hit"] = True
+            latency["retrieval"] = 0.0
+            latency["reranker"] = 0.0
+        else:
+            t_retrieval_start = time.perf_counter()
+            if search_task is not None:
+                allowed = await _stage(state, "retrieval", search_task)
+            else:
+                usage["pinecone_queries"] += 1
+                allowed = await _stage(
+                    state,
+                    "retrieval",
+                    _search(question, query_embedding, role, sparse_task)
+                )
+            latency["retrieval"] = time.perf_counter() - t_retrieval_start
+            state["matches"] = len(allowed)
+
+            top_children = []
+            if allowed:
+                t_rerank_start = time.perf_counter()
+                # Whatever the deadline leaves, short of the LLM's share
+                rerank_budget = RERANKER_TIMEOUT_SECONDS
+                if state["deadline"] is not None:
+                    rerank_budget = max(0.0, min(
+                        rerank_budget, _remaining(state) - _llm_reserve()
+                    ))
+                top_children, rerank_stats = await arerank_children(
+                    question, allowed, role, timeout=rerank_budget
+                )
+                latency["reranker"] = time.perf_counter() - t_rerank_start
+                usage.update(rerank_stats)
+                state["rerank_scores"] = [
+                    round(c.get("rerank_score", c.get("score", 0.0)), 3)
+                    for c in top_children
+                ]
+
+            if not top_children:
+                _discard(memory_task)
+                await astore_negative_cache(role, question, query_embedding)
+                state["answer"] = NO_DATA_ANSWER
+                return state
+
+            # A fallback ranking (Cohere timed out, its breaker was open or
+            # the request had no time left for it) is only kept briefly
+            await astore_retrieval_cache(
+                role,
+                question,
+                top_children,
+                ttl=RETRIEVAL_CACHE_DEGRADED_TTL if usage["reranker_degraded"] else None
+            )
+
+        t_context_start = time.perf_counter()
+        if state["compress"]:
+            context, context_stats = await asyncio.to_thread(
+                build_context, top_children, question, bm25
+            )
+        else:
+            context, context_stats = build_context(top_children)
+        # Compression is its own stage; "context" is the rest of the assembly
+        compression_seconds = context_stats.pop("compression_seconds")
+        if state["compress"]:
+            latency["compression"] = compression_seconds
+        latency["context"] = time.perf_counter() - t_context_start - compression_seconds
+        usage.update(context_stats)
+
+    except BaseException:
+        # Retrieval or rerank failed (503 / 504) or the request was cancelled
+        _discard(memory_task)
+        raise
+
+    if use_memory:
+        # With CONCURRENT_STAGES this is only the wait left after rerank
+        t_memory_start = time.perf_counter()
+        if memory_task is not None:
+            memory_messages = await memory_task
+        else:
+            memory_messages = await abuild_memory_context(session_id)
+        latency["memory"] = time.perf_counter() - t_memory_start
+    else:
+        memory_messages = [SystemMessage(content=SYSTEM_PROMPT)]
+
+    # Only the system prompt means no earlier turns shaped the answer
+    access = answer_access(
+        role, top_children, used_memory=len(memory_messages) > 1
     )
 
-    maybe_summarize(session_id, llm)
+    state["access"] = access
+    state["messages"] = memory_messages + [
+        SystemMessage(content="Answer only from context."),
+        HumanMessage(
+            content=f"Context:\n{context}\n\nQuestion: {question}"
+        )
+    ]
+    return state
+
+
+async def _remember(state: dict, answer: str, use_memory: bool, defer: bool = True):
+    """
+    Hands the answer to post-answer bookkeeping: cache writes under its
+    access set, session memory and summarization. A coalesced answer was
+    already cached by the request that produced it.
+    """
+    if state["cache"]["coalesced"] and not use_memory:
+        return
+
+    job = {
+        "session_id": state["session_id"],
+        "question": state["question"],
+        "answer": answer,
+        "access": state["access"],
+        "embedding": state.get("embedding"),
+        "version": get_index_version(),
+        "use_memory": use_memory,
+        "store": not state["cache"]["coalesced"],
+        "ts": time.time()
+    }
+    await submit_bookkeeping(job, llm, defer=defer)
+
+
+def _state_response(state: dict, answer: str, include_metrics: bool) -> dict:
+    record_request(state["latency"], state["usage"])
+    record_flight(state)
+    return _respond(
+        answer,
+        include_metrics,
+        state["t0"],
+        state["latency"],
+        state["usage"],
+        state["cache"],
+        state["overlapped"]
+    )
 
-    if not include_metrics:
-        return {"answer": answer}
+
+async def _generate(state: dict) -> str:
+    latency, usage = state["latency"], state["usage"]
+    t_llm_start = time.perf_counter()
+
+    response = await _stage(
+        state,
+        "llm",
+        guarded_call(
+            "llm", lambda: llm.ainvoke(state["messages"]), LLM_TIMEOUT_SECONDS
+        )
+    )
+
+    usage["llm_input_tokens"] = response.usage_metadata["input_tokens"]
+    usage["llm_output_tokens"] = response.usage_metadata["output_tokens"]
+
+    latency["llm"] = time.perf_counter() - t_llm_start
+    return response.content
+
+
+async def run_rag_pipeline(
+    payload,
+    current_user,
+    include_metrics: bool,
+    use_memory: bool = True,
+    defer_bookkeeping: bool = True,
+    compress: bool = False
+):
+    state = _new_state(payload, current_user, compress)
+    if await _check_exact(state):
+        return _state_response(state, state["answer"], include_metrics)
+
+    # An answer shaped by this session's history is not shared with others
+    flight_session = None
+    if use_memory and SINGLE_FLIGHT and await ahas_memory(state["session_id"]):
+        flight_session = state["session_id"]
+
+    generated = False
+    async with join_flight(
+        state["role"], state["question"], state["latency"], flight_session
+    ) as flight:
+        if flight.shared is not None:
+            _use_shared(state, flight.shared)
+        else:
+            await _embed_and_retrieve(state, use_memory, flight)
+            if state["answer"] is None:
+                state["answer"] = await _generate(state)
+                generated = True
+            flight.publish(state["answer"], state.get("access"))
+
+    answer = state["answer"]
+    result = _state_response(state, answer, include_metrics)
+
+    # Followers still record the turn in their own session
+    if generated or state["cache"]["coalesced"]:
+        await _remember(state, answer, use_memory, defer=defer_bookkeeping)
+
+    return result
+
+
+async def run_batch_pipeline(questions, current_user, compress: bool = False) -> dict:
+    """
+    Answers many questions for one role. Exact tiers are checked
+    concurrently, the misses are embedded in one API call and resolved
+    against the semantic cache in bulk. The rest retrieve, rerank and
+    generate ASK_BATCH_CONCURRENCY at a time. Questions that normalize
+    to the same text run once; the repeats get that answer as coalesced.
+    Session memory is neither read nor written. Results keep the input
+    order.
+    """
+    t0 = time.perf_counter()
+    role = current_user["role"]
+    states = [
+        _new_state(Query(question=q), current_user, compress) for q in questions
+    ]
+    results = [None] * len(states)
+
+    leaders, followers = {}, []
+    for i, state in enumerate(states):
+        key = normalize_question(state["question"])
+        if key in leaders:
+            followers.append((i, leaders[key]))
+        else:
+            leaders[key] = i
+    unique = list(leaders.values())
+
+    def settle(i: int):
+        results[i] = _state_response(states[i], states[i]["answer"], True)
+
+    def fail(i: int, e: Exception):
+        # Stage errors were mapped to 503 / 504 (and recorded) by _stage
+        if isinstance(e, HTTPException):
+            error = f"{e.status_code}: {e.detail}"
+        else:
+            error = f"{type(e).__name__}: {e}"
+            record_flight(states[i], error=error)
+        results[i] = {"error": error, **_state_response(states[i], None, True)}
+
+    settled = await asyncio.gather(*[_check_exact(states[i]) for i in unique])
+    for i, done in zip(unique, settled):
+        if done:
+            settle(i)
+
+    pending = [i for i, done in zip(unique, settled) if not done]
+
+    t_embed_start = time.perf_counter()
+    embedded, embedding_calls = [], 0
+    if pending:
+        try:
+            embedded, embedding_calls = await _stage(
+                states[pending[0]],
+                "embedding",
+                aembed_queries([states[i]["question"] for i in pending])
+            )
+        except HTTPException as e:
+            # Cached answers are already settled; only these items fail
+            for i in pending:
+                fail(i, e)
+            pending = []
+    embed_time = time.perf_counter() - t_embed_start
+    for i, (embedding, tokens, cache_hit) in zip(pending, embedded):
+        _set_embedding(states[i], embedding, tokens, cache_hit, embed_time)
+
+    hits = await asemantic_cache_lookup_many(
+        role, [states[i]["embedding"] for i in pending]
+    )
+
+    remaining = []
+    for i, (cached_answer, _) in zip(pending, hits):
+        record_cache("semantic", role, bool(cached_answer))
+        if cached_answer:
+            await _use_semantic_hit(states[i], cached_answer)
+            settle(i)
+        else:
+            remaining.append(i)
+
+    semaphore = asyncio.Semaphore(max(1, ASK_BATCH_CONCURRENCY))
+
+    async def finish(i: int):
+        state = states[i]
+        async with semaphore:
+            # The deadline starts once the item leaves the queue
+            state["deadline"] = time.perf_counter() + REQUEST_DEADLINE_SECONDS
+            bind_usage(state["usage"])
+            try:
+                await _retrieve(state, use_memory=False, semantic_checked=True)
+                if state["answer"] is None:
+                    answer = await _generate(state)
+                    state["answer"] = answer
+                    await _remember(state, answer, use_memory=False)
+                settle(i)
+
+            except Exception as e:
+                fail(i, e)
+
+    await asyncio.gather(*[finish(i) for i in remaining])
+
+    for i, leader in followers:
+        state = states[i]
+        state["cache"]["coalesced"] = True
+        if "error" in results[leader]:
+            results[i] = {
+                "error": results[leader]["error"],
+                **_state_response(state, None, True)
+            }
+        else:
+            state["answer"] = states[leader]["answer"]
+            settle(i)
 
     return {
-        "answer": answer,
-        "latency": {
-            "total": round(total_time, 3),
-            "embedding": round(embed_time, 3),
-            "retrieval": round(retrieval_time, 3),
-            "reranker": round(rerank_time, 3),
-            "llm": round(llm_time, 3)
-        },
-        "usage": {
-            "embedding_tokens": embedding_tokens,
-            "llm_input_tokens": llm_input_tokens,
-            "llm_output_tokens": llm_output_tokens,
-            "reranker_calls": reranker_calls
-        },
-        "cache": {
-            "semantic_cache_hit": semantic_cache_hit
+        "results": results,
+        "batch": {
+            "questions": len(states),
+            "unique_questions": len(unique),
+            "total": round(time.perf_counter() - t0, 3),
+            "embedding_calls": embedding_calls,
+            "embedding": round(embed_time, 3)
         }
     }
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_answer(state: dict, include_metrics: bool):
+    """
+    Yields one `token` event per LLM chunk, then a `done` event with the
+    full answer (and metrics). The answer is left in state["streamed"]
+    for the bookkeeping that runs once the response is sent.
+    """
+    latency, usage = state["latency"], state["usage"]
+    t_llm_start = time.perf_counter()
+    parts = []
+
+    breaker = breakers["llm"]
+    if not breaker.allow():
+        yield _sse("error", {"detail": "Answer generation temporarily unavailable"})
+        return
+
+    failed = False
+    try:
+        async for chunk in llm.astream(state["messages"]):
+            if chunk.content:
+                if not parts:
+                    latency["ttft"] = time.perf_counter() - state["t0"]
+                parts.append(chunk.content)
+                yield _sse("token", {"token": chunk.content})
+
+            if chunk.usage_metadata:
+                usage["llm_input_tokens"] = chunk.usage_metadata["input_tokens"]
+                usage["llm_output_tokens"] = chunk.usage_metadata["output_tokens"]
+
+    except Exception as e:
+        failed = True
+        breaker.record_failure()
+        print("LLM stream failed:", e)
+
+    except BaseException:
+        # A client that disconnects mid-stream says nothing about the LLM
+        breaker.release()
+        raise
+
+    if failed:
+        yield _sse("error", {"detail": "Answer generation failed"})
+        return
+
+    breaker.record_success()
+
+    latency["llm"] = time.perf_counter() - t_llm_start
+    answer = "".join(parts)
+    state["streamed"] = answer
+
+    yield _sse("done", _state_response(state, answer, include_metrics))
+
+
+async def _remember_streamed(state: dict, use_memory: bool):
+    # Only a stream that ran to completion is cached or remembered
+    if state.get("streamed") is None:
+        return
+
+    try:
+        await _remember(state, state["streamed"], use_memory)
+    except Exception as e:
+        print("Post-stream bookkeeping failed:", e)
+
+
 @router.post("/ask")
-def ask(payload: Query, current_user=Depends(get_current_user)):
-    return run_rag_pipeline(payload, current_user, include_metrics=False)
+async def ask(payload: Query, current_user=Depends(get_current_user)):
+    record_question(current_user["role"], payload.question)
+    return await run_rag_pipeline(
+        payload,
+        current_user,
+        include_metrics=False,
+        compress="ask" in CONTEXT_COMPRESSION_ROUTES
+    )
 
 
 @router.post("/ask_with_metrics")
-def ask_with_metrics(payload: Query, current_user=Depends(get_current_user)):
-    return run_rag_pipeline(payload, current_user, include_metrics=True)
+async def ask_with_metrics(payload: Query, current_user=Depends(get_current_user)):
+    record_question(current_user["role"], payload.question)
+    return await run_rag_pipeline(
+        payload,
+        current_user,
+        include_metrics=True,
+        compress="ask_with_metrics" in CONTEXT_COMPRESSION_ROUTES
+    )
+
+
+@router.post("/ask_batch")
+async def ask_batch(payload: BatchQuery, current_user=Depends(get_current_user)):
+    if not payload.questions:
+        raise HTTPException(status_code=400, detail="No questions")
+    if len(payload.questions) > ASK_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {ASK_BATCH_MAX_QUESTIONS} questions per batch"
+        )
+
+    for question in payload.questions:
+        record_question(current_user["role"], question)
+    return await run_batch_pipeline(
+        payload.questions,
+        current_user,
+        compress="ask_batch" in CONTEXT_COMPRESSION_ROUTES
+    )
+
+
+@router.post("/ask_stream")
+async def ask_stream(
+    payload: Query,
+    metrics: bool = False,
+    current_user=Depends(get_current_user)
+):
+    """
+    Server-Sent Events. A cached (or no-data) answer arrives as a single
+    `answer` event; otherwise `token` events stream as the LLM produces
+    them, followed by `done`.
+    """
+    record_question(current_user["role"], payload.question)
+    state = await _prepare(
+        payload,
+        current_user,
+        use_memory=True,
+        compress="ask_stream" in CONTEXT_COMPRESSION_ROUTES
+    )
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    if state["answer"] is not None:
+        event = _sse("answer", _state_response(state, state["answer"], metrics))
+        return StreamingResponse(
+            iter([event]), media_type="text/event-stream", headers=headers
+        )
+
+    return StreamingResponse(
+        _stream_answer(state, metrics),
+        media_type="text/event-stream",
+        headers=headers,
+        background=BackgroundTask(_remember_streamed, state, True)
+    )
@@ -0,0 +1,280 @@
+import json
+import time
+import uuid
+import asyncio
+import numpy as np
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from app.cache.redis_client import async_redis_client
+from app.cache.normalize import question_hash
+from app.cache.index_version import (
+    get_index_version,
+    register_versioned_namespace
+)
+from app.core.config import (
+    SINGLE_FLIGHT,
+    SINGLE_FLIGHT_TIMEOUT_SECONDS,
+    SINGLE_FLIGHT_SIMILARITY
+)
+
+# How long a finished answer stays readable for requests that arrive
+# before bookkeeping has written it to the exact cache
+RESULT_TTL = 30
+
+register_versioned_namespace("singleflight")
+
+# Only the owner may release the lock; an expired lock may already
+# belong to another worker.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_release = (
+    async_redis_client.register_script(_RELEASE_SCRIPT)
+    if async_redis_client is not None else None
+)
+
+_flights: Dict[str, "Flight"] = {}
+
+_stats = {
+    "leaders": 0,
+    "local_followers": 0,
+    "remote_followers": 0,
+    "near_duplicate_followers": 0,
+    "fallbacks": 0
+}
+
+
+class Flight:
+    """
+    One request's place in a coalesced group. `shared` is set when the
+    answer came from another request's pipeline; a leader publishes its
+    own answer for the others.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        role: str,
+        future: asyncio.Future,
+        leader: bool,
+        session_id: Optional[str] = None
+    ):
+        self.key = key
+        self.role = role
+        self.session_id = session_id
+        self.future = future
+        self.leader = leader
+        self.shared: Optional[Dict] = None
+        self.embedding: Optional[np.ndarray] = None
+        self.following = False
+
+    def publish(self, answer: str, access: Optional[List[str]]):
+        if self.leader and not self.future.done():
+            self.future.set_result({"answer": answer, "access": access or [self.role]})
+
+    def attach_embedding(self, embedding: list):
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        self.embedding = vec / norm if norm else vec
+
+    async def follow_near_duplicate(self, latency: dict) -> Optional[Dict]:
+        """
+        Waits for an in-flight question of the same role whose embedding
+        is within SINGLE_FLIGHT_SIMILARITY of this one. Only flights in
+        this worker are considered.
+        """
+        if SINGLE_FLIGHT_SIMILARITY <= 0 or self.embedding is None:
+            return None
+
+        best, best_score = None, SINGLE_FLIGHT_SIMILARITY
+        for other in _flights.values():
+            if other is self or other.following or other.embedding is None:
+                continue
+            if other.role != self.role or other.session_id != self.session_id:
+                continue
+            if other.future.done():
+                continue
+            score = float(other.embedding @ self.embedding)
+            if score >= best_score:
+                best, best_score = other, score
+
+        if best is None:
+            return None
+
+        # Marked before the first await so two flights never wait on each other
+        self.following = True
+        shared = await _wait_local(best.future, latency)
+        self.following = False
+        if shared is not None:
+            _stats["near_duplicate_followers"] += 1
+        return shared
+
+
+def _flight_key(role: str, question: str, session_id: Optional[str]) -> str:
+    scope = f"{role}:{session_id}" if session_id else role
+    return f"singleflight:{get_index_version()}:{scope}:{question_hash(question)}"
+
+
+def _lock_key(key: str) -> str:
+    return f"{key}:lock"
+
+
+def _result_key(key: str) -> str:
+    return f"{key}:result"
+
+
+async def _wait_local(future: asyncio.Future, latency: dict) -> Optional[Dict]:
+    t_wait_start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(
+            asyncio.shield(future), SINGLE_FLIGHT_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        return None
+    finally:
+        latency["coalesced_wait"] = time.perf_counter() - t_wait_start
+
+
+async def _wait_remote(key: str, latency: dict) -> Optional[Dict]:
+    """
+    Waits for the worker holding the lock to publish its answer. An empty
+    message means the leader failed.
+    """
+    t_wait_start = time.perf_counter()
+    pubsub = async_redis_client.pubsub()
+    try:
+        await pubsub.subscribe(_result_key(key))
+        # The answer may have been published before the subscription
+        raw = await async_redis_client.get(_result_key(key))
+
+        deadline = time.monotonic() + SINGLE_FLIGHT_TIMEOUT_SECONDS
+        while raw is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=remaining
+            )
+            if message is not None:
+                raw = message["data"]
+
+        return json.loads(raw) if raw else None
+
+    except Exception as e:
+        print("Single-flight wait failed:", e)
+        return None
+
+    finally:
+        latency["coalesced_wait"] = time.perf_counter() - t_wait_start
+        try:
+            await pubsub.aclose()
+        except Exception:
+            pass
+
+
+async def _claim(key: str, token: str):
+    """
+    Returns (answer published by a finished leader, whether the lock was
+    acquired).
+    """
+    pipe = async_redis_client.pipeline(transaction=False)
+    pipe.get(_result_key(key))
+    pipe.set(
+        _lock_key(key), token, nx=True, ex=max(1, int(SINGLE_FLIGHT_TIMEOUT_SECONDS))
+    )
+    raw, acquired = await pipe.execute()
+    return (json.loads(raw) if raw else None), bool(acquired)
+
+
+async def _finish(key: str, token: str, result: Optional[Dict]):
+    pipe = async_redis_client.pipeline(transaction=False)
+    if result is not None:
+        pipe.set(_result_key(key), json.dumps(result), ex=RESULT_TTL)
+        pipe.publish(_result_key(key), json.dumps(result))
+    else:
+        pipe.publish(_result_key(key), "")
+    await pipe.execute()
+    await _release(keys=[_lock_key(key)], args=[token])
+
+
+@asynccontextmanager
+async def join_flight(
+    role: str,
+    question: str,
+    latency: dict,
+    session_id: Optional[str] = None
+):
+    """
+    Coalesces concurrent requests for the same (role, normalized
+    question). Requests in this worker share one future; across workers
+    a Redis lock picks the leader and the answer is published on a
+    channel. A follower whose leader fails or exceeds
+    SINGLE_FLIGHT_TIMEOUT_SECONDS gets `shared` = None and answers on its
+    own. Pass `session_id` when the answer depends on the session's
+    memory; only requests of that session are coalesced then.
+    """
+    key = _flight_key(role, question, session_id)
+    loop = asyncio.get_running_loop()
+
+    if not SINGLE_FLIGHT:
+        yield Flight(key, role, loop.create_future(), leader=False, session_id=session_id)
+        return
+
+    current = _flights.get(key)
+    if current is not None:
+        flight = Flight(key, role, current.future, leader=False, session_id=session_id)
+        flight.shared = await _wait_local(current.future, latency)
+        _stats["local_followers" if flight.shared else "fallbacks"] += 1
+        yield flight
+        return
+
+    flight = Flight(key, role, loop.create_future(), leader=True, session_id=session_id)
+    _flights[key] = flight
+    token = uuid.uuid4().hex
+    locked = False
+
+    try:
+        if async_redis_client is not None:
+            try:
+                shared, locked = await _claim(key, token)
+                if shared is None and not locked:
+                    shared = await _wait_remote(key, latency)
+                    _stats["remote_followers" if shared else "fallbacks"] += 1
+
+                if shared is not None:
+                    # Local followers get the answer from this request
+                    flight.leader = False
+                    flight.shared = shared
+                    flight.future.set_result(shared)
+
+            except Exception as e:
+                print("Single-flight lock failed:", e)
+
+        if flight.leader:
+            _stats["leaders"] += 1
+
+        yield flight
+
+    finally:
+        if not flight.future.done():
+            flight.future.set_result(None)
+        if _flights.get(key) is flight:
+            del _flights[key]
+
+        if locked:
+            try:
+                if flight.leader:
+                    await _finish(key, token, flight.future.result())
+                else:
+                    await _release(keys=[_lock_key(key)], args=[token])
+            except Exception as e:
+                print("Single-flight publish failed:", e)
+
+
+def single_flight_stats() -> Dict:
+    return {"in_flight": len(_flights), **_stats}
@@ -0,0 +1,244 @@
+import json
+import glob
+import time
+import asyncio
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from app.models.query import Query
+from app.rag.routes import run_rag_pipeline
+from app.cache.hot_questions import top_questions
+from app.cache.index_version import (
+    use_index_version,
+    get_pending_index_version,
+    publish_index_version
+)
+from app.core.config import RBAC_ROLES
+from app.core.pricing import compute_cost
+
+EVAL_DATA_GLOB = "eval_data/*.jsonl"
+DEFAULT_CONCURRENCY = 4
+
+
+def load_question_file(path: str, roles: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+    """
+    Reads (role, question) pairs. JSONL records need "role" and "question";
+    plain-text lines are one question each, warmed for every role in `roles`.
+    """
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith("{"):
+                record = json.loads(line)
+                items.append((record["role"], record["question"]))
+            else:
+                for role in roles or RBAC_ROLES:
+                    items.append((role, line))
+
+    return items
+
+
+def eval_questions() -> List[Tuple[str, str]]:
+    items = []
+    for path in sorted(glob.glob(EVAL_DATA_GLOB)):
+        items.extend(load_question_file(path))
+    return items
+
+
+def traffic_questions(top_n: int, roles: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+    return [
+        (role, question)
+        for role in roles or RBAC_ROLES
+        for question in top_questions(role, top_n)
+    ]
+
+
+def dedupe(items: List[Tuple[str, str]], roles: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+    seen = set()
+    unique = []
+    for role, question in items:
+        if roles and role not in roles:
+            continue
+        if (role, question) in seen:
+            continue
+        seen.add((role, question))
+        unique.append((role, question))
+    return unique
+
+
+class WarmupJob:
+    """
+    Runs the full pipeline for each (role, question) on the current event
+    loop, at most `concurrency` at a time. Every question runs as its own
+    role, so each role's cache only receives answers generated under that
+    role's retrieval filter.
+    """
+
+    def __init__(
+        self,
+        items: List[Tuple[str, str]],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        version: Optional[str] = None,
+        verbose: bool = False
+    ):
+        self.items = items
+        self.concurrency = max(1, concurrency)
+        self.version = version
+        self.verbose = verbose
+
+        self.status = "pending"
+        self.done = 0
+        self.failed = 0
+        self.already_cached = 0
+        self.cost = 0.0
+        self.per_role: Dict[str, int] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    async def _warm_one(self, role: str, question: str) -> dict:
+        current_user = {
+            "email": f"warmup@{role}",
+            "role": role,
+            "user_id": f"warmup:{role}"
+        }
+
+        with use_index_version(self.version):
+            return await run_rag_pipeline(
+                Query(question=question),
+                current_user,
+                include_metrics=True,
+                use_memory=False,
+                # Entries must exist before the job reports done / promotes
+                defer_bookkeeping=False
+            )
+
+    def _record(self, role: str, question: str, result: Optional[dict]):
+        self.done += 1
+
+        if result is None:
+            self.failed += 1
+            return
+
+        cache = result.get("cache", {})
+        if any(cache.values()):
+            self.already_cached += 1
+
+        cost = compute_cost(result["usage"])["total"]
+        self.cost += cost
+        self.per_role[role] = self.per_role.get(role, 0) + 1
+
+        if self.verbose:
+            print(
+                f"[{self.done}/{len(self.items)}] {role:<9} "
+                f"{result['latency']['total']:.2f}s ${cost:.5f}  {question[:60]}"
+            )
+
+    async def _bounded(self, semaphore: asyncio.Semaphore, role: str, question: str):
+        async with semaphore:
+            try:
+                result = await self._warm_one(role, question)
+            except Exception as e:
+                print(f"Warm-up failed for [{role}] {question!r}:", e)
+                result = None
+        self._record(role, question, result)
+
+    async def run(self) -> dict:
+        self.status = "running"
+        self.started_at = time.time()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*[
+            self._bounded(semaphore, role, question)
+            for role, question in self.items
+        ])
+
+        self.finished_at = time.time()
+        self.status = "finished"
+        return self.progress()
+
+    def progress(self) -> dict:
+        end = self.finished_at or time.time()
+        return {
+            "status": self.status,
+            "total": len(self.items),
+            "done": self.done,
+            "failed": self.failed,
+            "already_cached": self.already_cached,
+            "per_role": dict(self.per_role),
+            "cost_usd": round(self.cost, 5),
+            "elapsed_s": round(end - self.started_at, 2) if self.started_at else 0.0,
+            "version": self.version
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--source",
+        choices=["eval", "log", "traffic"],
+        default="traffic"
+    )
+    parser.add_argument(
+        "--data",
+        type=str,
+        action="append",
+        help="Question log (JSONL with role/question, or one question per line)"
+    )
+    parser.add_argument("--roles", type=str, default=None)
+    parser.add_argument("--top_n", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--promote",
+        action="store_true",
+        help="Warm the staged index version, then activate it"
+    )
+    parser.add_argument("--version", type=str, default=None)
+    args = parser.parse_args()
+
+    roles = args.roles.split(",") if args.roles else None
+    version = args.version
+
+    if args.promote:
+        version = version or get_pending_index_version()
+        if not version:
+            raise SystemExit("No staged index version to promote")
+
+    if args.source == "eval":
+        items = eval_questions()
+    elif args.source == "log":
+        if not args.data:
+            raise SystemExit("--source log needs --data")
+        items = []
+        for path in args.data:
+            items.extend(load_question_file(path, roles))
+    else:
+        items = traffic_questions(args.top_n, roles)
+
+    items = dedupe(items, roles)
+    print(f"Warming {len(items)} questions (concurrency={args.concurrency})")
+
+    job = WarmupJob(items, args.concurrency, version, verbose=True)
+    summary = asyncio.run(job.run())
+
+    if args.promote:
+        publish_index_version(version, activate=True)
+        print(f"\n✅ Index version {version} is live")
+
+    print("\nWARM-UP SUMMARY")
+    print("=" * 40)
+    print(f"Questions        : {summary['total']}")
+    print(f"Failed           : {summary['failed']}")
+    print(f"Already cached   : {summary['already_cached']}")
+    for role, count in summary["per_role"].items():
+        print(f"{role:<17}: {count}")
+    print(f"Cost             : ${summary['cost_usd']:.5f}")
+    print(f"Runtime          : {summary['elapsed_s']:.2f}s")
+    print("=" * 40)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import os
+import glob
+import json
+import zlib
+import argparse
+from collections import Counter
+from html import escape
+from typing import Dict, List
+
+FRAME_HEIGHT = 16
+SVG_WIDTH = 1200
+
+
+def load_profile(path: str, interval_ms: float) -> Counter:
+    """
+    Reads a .collapsed or .speedscope.json file written by the profiling
+    middleware into {stack: samples}. Speedscope weights are milliseconds
+    and are divided by the sampling interval.
+    """
+    counts = Counter()
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            data = json.load(f)
+        frames = [fr["name"] for fr in data["shared"]["frames"]]
+        for profile in data["profiles"]:
+            for sample, weight in zip(profile["samples"], profile["weights"]):
+                counts[";".join(frames[i] for i in sample)] += weight / interval_ms
+        return counts
+
+    with open(path, "r") as f:
+        for line in f:
+            stack, _, n = line.rstrip("\n").rpartition(" ")
+            if stack:
+                counts[stack] += float(n)
+    return counts
+
+
+def frame_totals(counts: Counter):
+    """
+    (self samples, total samples) per frame; a recursive frame is
+    counted once per stack in its total.
+    """
+    self_time, total_time = Counter(), Counter()
+    for stack, n in counts.items():
+        frames = stack.split(";")
+        self_time[frames[-1]] += n
+        for frame in set(frames):
+            total_time[frame] += n
+    return self_time, total_time
+
+
+def _tree(counts: Counter) -> Dict:
+    root = {"name": "all", "value": 0, "children": {}}
+    for stack, n in counts.items():
+        node = root
+        node["value"] += n
+        for frame in stack.split(";"):
+            node = node["children"].setdefault(
+                frame, {"name": frame, "value": 0, "children": {}}
+            )
+            node["value"] += n
+    return root
+
+
+def _colour(name: str) -> str:
+    h = zlib.crc32(name.encode())
+    return f"rgb({205 + h % 50},{(h >> 8) % 180},{(h >> 16) % 55})"
+
+
+def flame_graph_svg(counts: Counter, title: str) -> str:
+    root = _tree(counts)
+    total = root["value"] or 1
+    rects: List[str] = []
+    depth_max = [0]
+
+    def draw(node, x: float, depth: int):
+        width = node["value"] / total * SVG_WIDTH
+        if width < 0.3:
+            return
+        depth_max[0] = max(depth_max[0], depth)
+        label = escape(node["name"])
+        share = 100 * node["value"] / total
+        text = escape(node["name"][: int(width / 7)])
+        rects.append(
+            f'<g><title>{label} ({node["value"]:.0f} samples, {share:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{{y{depth}}}" width="{width:.1f}" height="{FRAME_HEIGHT - 1}" '
+            f'fill="{_colour(node["name"])}"/>'
+            f'<text x="{x + 2:.1f}" y="{{t{depth}}}">{text}</text></g>'
+        )
+        child_x = x
+        for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+            draw(child, child_x, depth + 1)
+            child_x += child["value"] / total * SVG_WIDTH
+
+    draw(root, 0.0, 0)
+
+    # Root at the bottom, callees stacked above it
+    height = (depth_max[0] + 1) * FRAME_HEIGHT + 30
+    positions = {}
+    for depth in range(depth_max[0] + 1):
+        y = height - (depth + 1) * FRAME_HEIGHT
+        positions[f"y{depth}"] = y
+        positions[f"t{depth}"] = y + FRAME_HEIGHT - 4
+    body = "\n".join(r.format(**positions) for r in rects)
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" '
+        f'font-family="monospace" font-size="11">\n'
+        f'<text x="{SVG_WIDTH / 2}" y="18" text-anchor="middle" font-size="14">{escape(title)}</text>\n'
+        f"{body}\n</svg>\n"
+    )
+
+
+def print_top(counts: Counter, top: int):
+    self_time, total_time = frame_totals(counts)
+    samples = sum(counts.values()) or 1
+
+    print(f"{'SELF %':>7} {'TOTAL %':>8}  FRAME")
+    for frame, n in self_time.most_common(top):
+        print(f"{100 * n / samples:>6.1f}% {100 * total_time[frame] / samples:>7.1f}%  {frame}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Merges request profiles written with PROFILING_ENABLED into one "
+            "collapsed-stack file and an SVG flame graph."
+        )
+    )
+    parser.add_argument("--dir", type=str, default="profiles")
+    parser.add_argument("--pattern", type=str, default="*", help="e.g. '*-ask_with_metrics-*'")
+    parser.add_argument("--out", type=str, default=None, help="Merged collapsed stacks")
+    parser.add_argument("--svg", type=str, default="flamegraph.svg")
+    parser.add_argument("--top", type=int, default=25, help="Hottest frames by self time")
+    parser.add_argument("--interval_ms", type=float, default=2.0, help="PROFILE_INTERVAL_MS of the server")
+    args = parser.parse_args()
+
+    paths = [
+        p for p in sorted(glob.glob(os.path.join(args.dir, args.pattern)))
+        if p.endswith((".collapsed", ".speedscope.json"))
+    ]
+    if not paths:
+        print(f"No profiles in {args.dir} matching {args.pattern}")
+        return
+
+    counts = Counter()
+    for path in paths:
+        counts.update(load_profile(path, args.interval_ms))
+
+    print("=" * 60)
+    print(f"PROFILES: {len(paths)} files, {sum(counts.values()):.0f} samples")
+    print("=" * 60)
+    print_top(counts, args.top)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            f.writelines(f"{stack} {n:.0f}\n" for stack, n in counts.most_common())
+        print(f"\nCollapsed stacks written to {args.out}")
+
+    if args.svg:
+        with open(args.svg, "w") as f:
+            f.write(flame_graph_svg(counts, f"{len(paths)} profiles from {args.dir}"))
+        print(f"Flame graph written to {args.svg}")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
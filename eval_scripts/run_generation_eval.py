@@ -10,6 +10,7 @@ from pinecone import Pinecone
 from langchain_huggingface import HuggingFaceEmbeddings
 from pinecone_text.sparse import BM25Encoder
 
+from app.rag.compression import compress_text
 from app.core.config import (
     PINECONE_API_KEY,
     PINECONE_INDEX,
@@ -71,11 +72,14 @@ def retrieve(index, emb, bm25, role: str, question: str):
     ]
 
 
-def build_context(matches):
+def build_context(matches, question=None, bm25=None):
 
     chunks = []
     for m in matches:
-        chunks.append(m.metadata["text"])
+        text = m.metadata["text"]
+        if question is not None:
+            text = compress_text(question, text, bm25)
+        chunks.append(text)
 
     return "\n\n".join(chunks)
 
@@ -124,10 +128,11 @@ def score_relevance(co, question, answer):
     return score
 
 
-def evaluate(records, index, emb, bm25, llm, co, max_q):
+def evaluate(records, index, emb, bm25, llm, co, max_q, compress=False):
 
     faithfulness_scores = []
     relevance_scores = []
+    compression = {"chars_before": 0, "chars_after": 0, "seconds": 0.0}
 
     for i, r in enumerate(records[:max_q], start=1):
 
@@ -142,6 +147,14 @@ def evaluate(records, index, emb, bm25, llm, co, max_q):
 
         context = build_context(matches)
 
+        if compress:
+            t_compress_start = time.perf_counter()
+            compressed = build_context(matches, q, bm25)
+            compression["seconds"] += time.perf_counter() - t_compress_start
+            compression["chars_before"] += len(context)
+            compression["chars_after"] += len(compressed)
+            context = compressed
+
         faith_score, _ = score_faithfulness(
             llm, q, gt_answer, context
         )
@@ -158,7 +171,7 @@ def evaluate(records, index, emb, bm25, llm, co, max_q):
     avg_faith = sum(faithfulness_scores) / len(faithfulness_scores)
     avg_rel = sum(relevance_scores) / len(relevance_scores)
 
-    return avg_faith, avg_rel
+    return avg_faith, avg_rel, compression
 
 
 def main():
@@ -166,6 +179,11 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--data", type=str, required=True)
     parser.add_argument("--max_q", type=int, default=60)
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Score against the extractively compressed context"
+    )
     args = parser.parse_args()
 
     records = load_eval_data(args.data)
@@ -174,14 +192,15 @@ def main():
 
     start = time.time()
 
-    avg_faith, avg_rel = evaluate(
+    avg_faith, avg_rel, compression = evaluate(
         records,
         index,
         emb,
         bm25,
         llm,
         co,
-        args.max_q
+        args.max_q,
+        compress=args.compress
     )
 
     elapsed = time.time() - start
@@ -191,6 +210,10 @@ def main():
     print(f"Avg Faithfulness     : {avg_faith:.3f}")
     print(f"Avg Answer Relevance : {avg_rel:.2f} / 5")
     print(f"Runtime              : {elapsed:.2f}s")
+    if args.compress and compression["chars_before"]:
+        kept = compression["chars_after"] / compression["chars_before"]
+        print(f"Context kept         : {kept:.1%} of characters")
+        print(f"Compression time     : {compression['seconds']:.2f}s")
     print("=" * 40)
 
 
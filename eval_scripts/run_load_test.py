@@ -0,0 +1,140 @@
+import json
+import asyncio
+import argparse
+import time
+import httpx
+import numpy as np
+from typing import Dict, List
+
+
+def load_questions(path: str) -> List[str]:
+    with open(path, "r") as f:
+        return [json.loads(line)["question"] for line in f if line.strip()]
+
+
+async def run_level(
+    api_url: str,
+    token: str,
+    questions: List[str],
+    concurrency: int,
+    total_requests: int,
+    timeout: float
+) -> Dict:
+    """
+    Keeps `concurrency` requests in flight until `total_requests` are done.
+    """
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    }
+    latencies, errors = [], 0
+    counter = iter(range(total_requests))
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+
+        async def user():
+            nonlocal errors
+            for i in counter:
+                question = questions[i % len(questions)]
+                start = time.perf_counter()
+                try:
+                    resp = await client.post(
+                        api_url, headers=headers, json={"question": question}
+                    )
+                    resp.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except Exception as e:
+                    errors += 1
+                    print("Request failed:", e)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[user() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_s": float(np.percentile(latencies, 50)) if latencies else 0.0,
+        "p95_s": float(np.percentile(latencies, 95)) if latencies else 0.0
+    }
+
+
+def print_results(label: str, results: List[Dict], workers: int):
+    print(f"\n{label}")
+    print(f"{'conc':>5} {'req/s':>8} {'req/s/worker':>13} {'p50 s':>7} {'p95 s':>7} {'errors':>7}")
+    for r in results:
+        print(
+            f"{r['concurrency']:>5} {r['throughput_rps']:>8.2f} "
+            f"{r['throughput_rps'] / workers:>13.2f} {r['p50_s']:>7.2f} "
+            f"{r['p95_s']:>7.2f} {r['errors']:>7}"
+        )
+
+
+def print_comparison(before: List[Dict], after: List[Dict]):
+    previous = {r["concurrency"]: r for r in before}
+    print("\nBEFORE -> AFTER (req/s)")
+    for r in after:
+        b = previous.get(r["concurrency"])
+        if b is None or not b["throughput_rps"]:
+            continue
+        print(
+            f"{r['concurrency']:>5}: {b['throughput_rps']:.2f} -> "
+            f"{r['throughput_rps']:.2f} ({r['throughput_rps'] / b['throughput_rps']:.1f}x)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Closed-loop load test. Point it at a deployment with cold caches "
+            "(or a freshly published index version) to measure the full pipeline."
+        )
+    )
+    parser.add_argument("--data", required=True)
+    parser.add_argument("--api_url", required=True)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--concurrency", type=str, default="1,4,16,64")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per level")
+    parser.add_argument("--workers", type=int, default=1, help="Server worker processes")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--label", type=str, default="run")
+    parser.add_argument("--out", type=str, default=None, help="Save results as JSON")
+    parser.add_argument("--compare", type=str, default=None, help="Earlier --out file")
+    args = parser.parse_args()
+
+    questions = load_questions(args.data)
+
+    results = []
+    for level in [int(c) for c in args.concurrency.split(",")]:
+        print(f"Running concurrency={level} ({args.requests} requests)")
+        results.append(asyncio.run(run_level(
+            args.api_url,
+            args.token,
+            questions,
+            level,
+            args.requests,
+            args.timeout
+        )))
+
+    print("=" * 60)
+    print(f"LOAD TEST: {args.label} ({args.workers} worker(s))")
+    print("=" * 60)
+    print_results("THROUGHPUT / LATENCY", results, args.workers)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            print_comparison(json.load(f)["results"], results)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"label": args.label, "workers": args.workers, "results": results}, f, indent=2)
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
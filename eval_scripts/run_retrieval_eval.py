@@ -3,17 +3,27 @@ import argparse
 import time
 from typing import List, Dict
 
+import cohere
 from pinecone import Pinecone
 from langchain_huggingface import HuggingFaceEmbeddings
 from pinecone_text.sparse import BM25Encoder
 
+from app.rag.rerank_policy import SKIP, rerank_plan
 from app.core.config import (
     PINECONE_API_KEY,
     PINECONE_INDEX,
+    COHERE_API_KEY,
     TOP_K,
-    PINECONE_SCORE_THRESHOLD
+    PINECONE_SCORE_THRESHOLD,
+    RERANK_SCORE_THRESHOLD,
+    RERANK_SKIP_MARGIN,
+    RERANK_SKIP_MIN_SCORE,
+    RERANK_SKIP_MAX_ENTROPY,
+    RERANK_CANDIDATE_WINDOW
 )
 
+RERANK_TOP_N = 3
+
 
 def load_eval_data(path: str) -> List[Dict]:
     records = []
@@ -112,6 +122,113 @@ def evaluate(records: List[Dict], index, emb, bm25):
     return recall, precision, mrr, failure_cases
 
 
+def reciprocal_rank(retrieved_ids: List[str], gold_docs) -> float:
+    for i, doc in enumerate(retrieved_ids):
+        if doc in gold_docs:
+            return 1 / (i + 1)
+    return 0.0
+
+
+def evaluate_rerank(records: List[Dict], index, emb, bm25, co, policy: Dict):
+    """
+    Top-3 after a full Cohere rerank vs. after the adaptive policy. One
+    rerank call per question: rerank scores do not depend on the other
+    documents, so a shrunk shortlist reuses them.
+    """
+    evaluated = 0
+    skipped = shrunk = 0
+    docs_full = docs_adaptive = 0
+    top1_agree = 0
+    full = {"recall": 0, "mrr": 0.0}
+    adaptive = {"recall": 0, "mrr": 0.0}
+
+    for r in records:
+        gold_docs = set(r["relevant_doc_ids"])
+        results = run_retrieval(index, emb, bm25, r["role"], r["question"])
+        if not results:
+            continue
+
+        candidates = [
+            {"chunk": m.metadata["text"], "doc_id": m.metadata["doc_id"], "score": m.score}
+            for m in results
+        ]
+
+        resp = co.rerank(
+            model="rerank-v3.5",
+            query=r["question"],
+            documents=[c["chunk"] for c in candidates],
+            top_n=len(candidates)
+        )
+        for res in resp.results:
+            candidates[res.index]["rerank_score"] = res.relevance_score
+
+        def reranked(subset):
+            ordered = sorted(subset, key=lambda c: c["rerank_score"], reverse=True)
+            return [
+                c for c in ordered if c["rerank_score"] >= RERANK_SCORE_THRESHOLD
+            ][:RERANK_TOP_N]
+
+        full_top = reranked(candidates)
+
+        decision, subset = rerank_plan(candidates, policy)
+        if decision == SKIP:
+            skipped += 1
+            adaptive_top = subset[:RERANK_TOP_N]
+        else:
+            shrunk += len(subset) < len(candidates)
+            docs_adaptive += len(subset)
+            adaptive_top = reranked(subset)
+
+        evaluated += 1
+        docs_full += len(candidates)
+
+        for top, totals in ((full_top, full), (adaptive_top, adaptive)):
+            ids = [c["doc_id"] for c in top]
+            totals["recall"] += any(doc in gold_docs for doc in ids)
+            totals["mrr"] += reciprocal_rank(ids, gold_docs)
+
+        if full_top and adaptive_top and full_top[0]["doc_id"] == adaptive_top[0]["doc_id"]:
+            top1_agree += 1
+
+    n = evaluated or 1
+    return {
+        "evaluated": evaluated,
+        "full_recall": full["recall"] / n,
+        "full_mrr": full["mrr"] / n,
+        "adaptive_recall": adaptive["recall"] / n,
+        "adaptive_mrr": adaptive["mrr"] / n,
+        "skip_rate": skipped / n,
+        "shrink_rate": shrunk / n,
+        "rerank_calls_saved": skipped,
+        "docs_reranked_full": docs_full,
+        "docs_reranked_adaptive": docs_adaptive,
+        "top1_agreement": top1_agree / n
+    }
+
+
+def print_rerank_report(report: Dict, policy: Dict):
+    print("\nADAPTIVE RERANK")
+    print("=" * 40)
+    print(
+        f"Policy            : margin={policy['margin']} min_score={policy['min_score']} "
+        f"max_entropy={policy['max_entropy']} window={policy['window']}"
+    )
+    print(f"Questions         : {report['evaluated']}")
+    print(f"Recall@{RERANK_TOP_N} full    : {report['full_recall']:.4f}")
+    print(f"Recall@{RERANK_TOP_N} adaptive: {report['adaptive_recall']:.4f}")
+    print(f"MRR full          : {report['full_mrr']:.4f}")
+    print(f"MRR adaptive      : {report['adaptive_mrr']:.4f}")
+    print(f"Top-1 agreement   : {report['top1_agreement']:.2%}")
+    print(f"Skip rate         : {report['skip_rate']:.2%}")
+    print(f"Shrink rate       : {report['shrink_rate']:.2%}")
+    print(f"Rerank calls saved: {report['rerank_calls_saved']}")
+    print(
+        f"Docs reranked     : {report['docs_reranked_full']} -> "
+        f"{report['docs_reranked_adaptive']}"
+    )
+    print("=" * 40)
+
+
 def main():
 
     parser = argparse.ArgumentParser()
@@ -120,6 +237,15 @@ def main():
         type=str,
         required=True
     )
+    parser.add_argument(
+        "--rerank",
+        action="store_true",
+        help="Compare full Cohere rerank with the adaptive rerank policy"
+    )
+    parser.add_argument("--margin", type=float, default=RERANK_SKIP_MARGIN)
+    parser.add_argument("--min_score", type=float, default=RERANK_SKIP_MIN_SCORE)
+    parser.add_argument("--max_entropy", type=float, default=RERANK_SKIP_MAX_ENTROPY)
+    parser.add_argument("--window", type=float, default=RERANK_CANDIDATE_WINDOW)
     args = parser.parse_args()
 
     records = load_eval_data(args.data)
@@ -148,6 +274,17 @@ def main():
         for f in failures[:5]:
             print(json.dumps(f, indent=2))
 
+    if args.rerank:
+        policy = {
+            "margin": args.margin,
+            "min_score": args.min_score,
+            "max_entropy": args.max_entropy,
+            "window": args.window
+        }
+        co = cohere.ClientV2(api_key=COHERE_API_KEY)
+        report = evaluate_rerank(records, index, emb, bm25, co, policy)
+        print_rerank_report(report, policy)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,93 @@
+import json
+import argparse
+import time
+import numpy as np
+
+from app.cache.semantic_index import EmbeddingMatrix
+from app.cache.semantic_cache import cosine_sim
+
+
+def build_matrix(n: int, dim: int, rng) -> EmbeddingMatrix:
+    matrix = EmbeddingMatrix()
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    for i, vec in enumerate(vectors):
+        matrix.upsert(f"semantic_cache:bench:{i}", vec)
+    return matrix
+
+
+def bench_index(matrix: EmbeddingMatrix, queries) -> list:
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        matrix.best(q)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_legacy(n: int, dim: int, queries, rng) -> list:
+    """
+    Old lookup path without the Redis round trips: JSON decode of every
+    stored embedding followed by a per-entry cosine.
+    """
+    stored = [
+        json.dumps(v.tolist())
+        for v in rng.standard_normal((n, dim)).astype(np.float32)
+    ]
+
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        best = 0.0
+        for raw in stored:
+            score = cosine_sim(q, json.loads(raw))
+            if score > best:
+                best = score
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def print_block(title, timings):
+    ms = np.array(timings) * 1000
+    print(f"\n{title}")
+    print(f"P50: {np.percentile(ms, 50):.3f} ms")
+    print(f"P95: {np.percentile(ms, 95):.3f} ms")
+    print(f"P99: {np.percentile(ms, 99):.3f} ms")
+    print(f"AVG: {np.mean(ms):.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=str, default="1000,10000,100000")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--legacy_max",
+        type=int,
+        default=10000,
+        help="Skip the legacy loop above this many entries (it is slow)"
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    print("=" * 60)
+    print("SEMANTIC CACHE LOOKUP BENCHMARK (in-process, excludes Redis)")
+    print("=" * 60)
+
+    for n in [int(s) for s in args.sizes.split(",")]:
+        matrix = build_matrix(n, args.dim, rng)
+        print_block(f"INDEX LOOKUP @ {n} entries", bench_index(matrix, queries))
+
+        if n <= args.legacy_max:
+            legacy_queries = queries[:max(1, args.queries // 20)]
+            print_block(
+                f"LEGACY LOOP @ {n} entries",
+                bench_legacy(n, args.dim, legacy_queries, rng)
+            )
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,3 +17,8 @@ DIMENSION = 1536
 METRIC = "dotproduct"
 CLOUD = "aws"
 REGION = "us-east-1"
+
+REDIS_HOST = os.getenv("REDIS_HOST")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_USERNAME = os.getenv("REDIS_USERNAME")
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
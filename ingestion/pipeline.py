@@ -1,12 +1,15 @@
+import argparse
+
 from loader import load_documents
 from preprocessor import preprocess
 from chunker import parent_chunk, child_chunk
 from embedder import dense_embed
 from hybrid_encoder import sparse_embed
 from vector_store import init_index, hybrid_upsert
+from version_publisher import new_corpus_version, publish_corpus_version
 
 
-def run_pipeline():
+def run_pipeline(stage=False):
     print("[1] Loading documents...")
     documents = load_documents()
 
@@ -31,8 +34,23 @@ def run_pipeline():
     print("[8] Hybrid upsert...")
     hybrid_upsert(index, embedded_child_chunks, sparse_vectors)
 
+    version = new_corpus_version()
+    if stage:
+        print(f"[9] Staging corpus version {version}...")
+    else:
+        print(f"[9] Publishing corpus version {version}...")
+    publish_corpus_version(version, activate=not stage)
+
     print("✅ Ingestion pipeline completed successfully")
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--stage",
+        action="store_true",
+        help="Stage the corpus version; promote it with `python -m app.rag.warmup --promote`"
+    )
+    args = parser.parse_args()
+
+    run_pipeline(stage=args.stage)
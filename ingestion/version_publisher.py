@@ -0,0 +1,41 @@
+import time
+import redis
+from config import (
+    REDIS_HOST,
+    REDIS_PORT,
+    REDIS_USERNAME,
+    REDIS_PASSWORD,
+)
+
+# Must match app/cache/index_version.py
+INDEX_VERSION_KEY = "rag:index_version"
+PENDING_INDEX_VERSION_KEY = "rag:index_version:pending"
+KNOWN_VERSIONS_KEY = "rag:index_versions"
+DEFAULT_INDEX_VERSION = "0"
+
+
+def new_corpus_version():
+    return time.strftime("%Y%m%d%H%M%S", time.gmtime())
+
+
+def publish_corpus_version(version, activate=True):
+    if not (REDIS_HOST and REDIS_PASSWORD):
+        print("⚠️ Redis config missing, corpus version not published")
+        return
+
+    client = redis.Redis(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        username=REDIS_USERNAME,
+        password=REDIS_PASSWORD,
+        decode_responses=True,
+    )
+
+    pipe = client.pipeline()
+    pipe.sadd(KNOWN_VERSIONS_KEY, version, DEFAULT_INDEX_VERSION)
+    if activate:
+        pipe.set(INDEX_VERSION_KEY, version)
+        pipe.delete(PENDING_INDEX_VERSION_KEY)
+    else:
+        pipe.set(PENDING_INDEX_VERSION_KEY, version)
+    pipe.execute()